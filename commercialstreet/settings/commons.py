@@ -48,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -133,6 +134,10 @@ REST_FRAMEWORK = {
     "COERCE_DECIMAL_TO_STRING": False,
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    "DEFAULT_RENDERER_CLASSES": (
+        "store.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
      "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
@@ -179,11 +184,57 @@ ADMINS = [
 CELERY_BEAT_SCHEDULE = {
     'notify_customers':{
         'task':'playground.tasks.notify_customers',
-        'schedule': 5,    # crontab(day_of_week=1,hour=7,minute=30), # crontab(minute='*/15')
+        'schedule': crontab(day_of_week=1,hour=7,minute=30), # crontab(minute='*/15')
         'args':['hello world']
-    }
+    },
+    # Picks up order events whose on_commit publish never reached the broker
+    'dispatch_order_events':{
+        'task':'store.tasks.dispatch_order_events',
+        'schedule': 60,
+    },
+    'reap_expired_carts':{
+        'task':'store.tasks.reap_expired_carts',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'refresh_sales_buckets':{
+        'task':'store.tasks.refresh_sales_buckets',
+        'schedule': crontab(minute='*/5'),
+    },
+    'write_back_like_counts':{
+        'task':'likes.tasks.write_back_like_counts',
+        'schedule': 60,
+    },
 }
 
+# store.tasks.reap_expired_carts
+CART_TTL_DAYS = 30
+CART_REAPER_BATCH_SIZE = 1000
+
+# store.tasks.refresh_sales_buckets, orders per transaction and how old an
+# order must be before it is folded into the buckets
+REPORTING_BATCH_SIZE = 1000
+REPORTING_SETTLE_SECONDS = 60
+
+# likes.counters.LikeCounter, 'app_label.model' names accepted by /likes/
+LIKEABLE_MODELS = ['store.product']
+LIKE_COUNTER_SHARDS = 8
+
+# store.renderers.StreamingListMixin, rows per .iterator() chunk
+STORE_STREAM_CHUNK_SIZE = 500
+
+NOTIFY_CUSTOMERS_CHUNK_SIZE = 500
+NOTIFY_CUSTOMERS_RATE_LIMIT = '30/m'
+
+# core.middleware.QueryProfilerMiddleware
+QUERY_PROFILER_SAMPLE_RATE = 0.01
+QUERY_PROFILER_BUFFER_SIZE = 1000
+QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = 5
+
+# Upstream used by playground.views.say_hello, see playground.upstream
+HTTPBIN_URL = 'https://httpbin.org/delay/2'
+UPSTREAM_FRESH_TTL = 5 * 60
+UPSTREAM_STALE_TTL = 60 * 60
+
 
 
 LOGGING = {
@@ -28,6 +28,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('playground/', include('playground.urls')),
     path('store/', include('store.urls')),
+    path('likes/', include('likes.urls')),
      path('auth/', include('djoser.urls')),
      path('auth/', include('djoser.urls.jwt')),
      path('__debug__/', include('debug_toolbar.urls')),
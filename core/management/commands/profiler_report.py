@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.profiling import profile_buffer
+
+
+class Command(BaseCommand):
+    help = 'Prints per-view query/DB/serializer aggregates collected by QueryProfilerMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Empty the profile buffer afterwards')
+
+    def handle(self, *args, **options):
+        summary = profile_buffer.summary()
+        if not summary:
+            self.stdout.write('No sampled requests yet')
+
+        for view in summary:
+            self.stdout.write(self.style.MIGRATE_HEADING(view['view']))
+            self.stdout.write(
+                f"  samples {view['samples']}  queries avg {view['avg_queries']} max {view['max_queries']}  "
+                f"db {view['avg_db_ms']}ms  serializer {view['avg_serializer_ms']}ms  "
+                f"total {view['avg_total_ms']}ms  size {view['avg_size']}B")
+            for shape, requests in view['n_plus_one'].items():
+                self.stdout.write(self.style.WARNING(f'  repeated in {requests} requests: {shape}'))
+
+        if options['clear']:
+            profile_buffer.clear()
@@ -0,0 +1,72 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from .profiling import RequestProfile, profile_buffer
+
+
+class QueryProfilerMiddleware:
+    """
+    Profiles a sample of requests (QUERY_PROFILER_SAMPLE_RATE) and appends
+    query count, DB time, serializer time, response size and repeated SQL
+    shapes (likely N+1s) to the profile buffer. Unsampled requests only pay
+    for one random() call. Serializer time is only measured for serializers
+    using TimedSerializerMixin.
+
+    Under ASGI the views run in sync_to_async threads, which copy the
+    request's context: they see the same profile and, since database
+    connections are context-local, the same connection and its wrapper.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return random.random() < getattr(settings, 'QUERY_PROFILER_SAMPLE_RATE', 0)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profile = RequestProfile(view=request.path)
+        token = profile.activate()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            profile.deactivate(token)
+        return self.record(request, response, profile, start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        profile = RequestProfile(view=request.path)
+        token = profile.activate()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile):
+                response = await self.get_response(request)
+        finally:
+            profile.deactivate(token)
+        # the buffer is in the cache, keep its round trips off the event loop
+        return await sync_to_async(self.record)(request, response, profile, start)
+
+    def record(self, request, response, profile, start):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            profile.view = f'{request.method} {match.view_name}'
+        size = 0 if response.streaming else len(response.content)
+        profile_buffer.append(profile.as_record(response.status_code, size, time.perf_counter() - start))
+        return response
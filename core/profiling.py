@@ -0,0 +1,149 @@
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+_current = ContextVar('request_profile', default=None)
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def sql_shape(sql):
+    # IN lists of different lengths are the same query shape
+    return IN_LIST.sub('IN (...)', sql)
+
+
+class RequestProfile:
+    def __init__(self, view):
+        self.view = view
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.shapes[sql_shape(sql)] += 1
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+    def repeated_shapes(self):
+        threshold = getattr(settings, 'QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 5)
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+    def as_record(self, status_code, size, total_time):
+        return {
+            'view': self.view,
+            'status': status_code,
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'total_ms': round(total_time * 1000, 2),
+            'size': size,
+            'repeated': self.repeated_shapes(),
+        }
+
+
+@contextmanager
+def serializer_timer():
+    """
+    Adds the time spent inside to the serializer time of the request being
+    profiled, if any. Nested timers are only counted once.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    profile.serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.serializer_depth -= 1
+        if profile.serializer_depth == 0:
+            profile.serializer_time += time.perf_counter() - start
+
+
+class TimedSerializerMixin:
+    """
+    Opt-in serializer timing for QueryProfilerMiddleware. Times
+    to_representation, so with many=True every item is counted and nested
+    serializers using the mixin too aren't counted twice.
+    """
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
+class ProfileBuffer:
+    """
+    Ring buffer of request records kept in the default cache, so every web
+    process writes to it and the admin endpoint / management command can
+    read it. Slot n is overwritten by record n + size.
+    """
+    prefix = 'core:profiler'
+
+    @property
+    def size(self):
+        return getattr(settings, 'QUERY_PROFILER_BUFFER_SIZE', 1000)
+
+    def append(self, record):
+        key = f'{self.prefix}:cursor'
+        try:
+            position = cache.incr(key)
+        except ValueError:
+            cache.add(key, 0, timeout=None)
+            position = cache.incr(key)
+        cache.set(f'{self.prefix}:slot:{position % self.size}', record, timeout=None)
+
+    def records(self):
+        keys = [f'{self.prefix}:slot:{slot}' for slot in range(self.size)]
+        return list(cache.get_many(keys).values())
+
+    def clear(self):
+        cache.delete_many([f'{self.prefix}:cursor'] + [f'{self.prefix}:slot:{slot}' for slot in range(self.size)])
+
+    def summary(self):
+        views = defaultdict(list)
+        for record in self.records():
+            views[record['view']].append(record)
+
+        summary = []
+        for view, records in views.items():
+            repeated = Counter()
+            for record in records:
+                repeated.update(record['repeated'].keys())
+            queries = sorted(record['queries'] for record in records)
+            summary.append({
+                'view': view,
+                'samples': len(records),
+                'avg_queries': round(sum(queries) / len(queries), 1),
+                'max_queries': queries[-1],
+                'avg_db_ms': round(sum(r['db_ms'] for r in records) / len(records), 2),
+                'avg_serializer_ms': round(sum(r['serializer_ms'] for r in records) / len(records), 2),
+                'avg_total_ms': round(sum(r['total_ms'] for r in records) / len(records), 2),
+                'avg_size': round(sum(r['size'] for r in records) / len(records)),
+                # shape → number of sampled requests that repeated it
+                'n_plus_one': dict(repeated.most_common(5)),
+            })
+        return sorted(summary, key=lambda view: view['avg_db_ms'], reverse=True)
+
+
+profile_buffer = ProfileBuffer()
@@ -0,0 +1,90 @@
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from model_bakery import baker
+from rest_framework import status
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+
+from core.profiling import RequestProfile, profile_buffer
+from store.models import Cart, CartItem, Product
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def profile_everything(settings):
+    settings.QUERY_PROFILER_SAMPLE_RATE = 1
+    settings.QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = 3
+    profile_buffer.clear()
+    yield
+    profile_buffer.clear()
+
+
+@pytest.mark.django_db
+class TestQueryProfiler:
+
+    def test_if_request_is_sampled_it_is_recorded(self, api_client):
+        baker.make(Product, _quantity=2)
+
+        api_client.get("/store/products/")
+
+        [record] = profile_buffer.records()
+        assert record['view'] == 'GET products-list'
+        assert record['queries'] > 0
+        assert record['size'] > 0
+
+    def test_if_request_is_served_over_asgi_it_is_recorded(self):
+        baker.make(Product, _quantity=2)
+
+        async_to_sync(AsyncClient().get)("/store/products/")
+
+        [record] = profile_buffer.records()
+        assert record['view'] == 'GET products-list'
+        assert record['queries'] > 0
+        assert record['serializer_ms'] > 0
+
+    def test_if_query_repeats_per_item_it_is_flagged(self):
+        cart = baker.make(Cart)
+        for product in baker.make(Product, _quantity=3):
+            baker.make(CartItem, cart=cart, product=product)
+        profile = RequestProfile(view='cart')
+
+        with connection.execute_wrapper(profile):
+            # without select_related every item loads its product separately
+            [item.product.unit_price for item in CartItem.objects.filter(cart=cart)]
+
+        assert profile.queries == 4
+        [(shape, count)] = profile.repeated_shapes().items()
+        assert 'store_product' in shape
+        assert count == 3
+
+    def test_if_user_is_not_admin_returns_403(self, api_client):
+        api_client.force_authenticate(user=baker.make('core.User'))
+
+        response = api_client.get("/profiler/")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_if_admin_gets_profiler_returns_summary(self, api_client):
+        api_client.force_authenticate(user=baker.make('core.User', is_staff=True))
+        api_client.get("/store/collections/")
+
+        response = api_client.get("/profiler/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'GET collection-list' in [view['view'] for view in response.data]
+
+    def test_report_command_prints_views(self, api_client):
+        api_client.get("/store/collections/")
+        out = StringIO()
+
+        call_command('profiler_report', stdout=out)
+
+        assert 'GET collection-list' in out.getvalue()
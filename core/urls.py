@@ -3,5 +3,6 @@ from django.views.generic import TemplateView
 from . import views
 
 urlpatterns = [
-    path("", TemplateView.as_view(template_name='core/index.html'))
-]
\ No newline at end of file
+    path("", TemplateView.as_view(template_name='core/index.html')),
+    path("profiler/", views.ProfilerView.as_view()),
+]
@@ -1,3 +1,17 @@
-from django.shortcuts import render
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .profiling import profile_buffer
+
+
+class ProfilerView(APIView):
+    """Per-view aggregates of the requests sampled by QueryProfilerMiddleware."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(profile_buffer.summary())
+
+    def delete(self, request):
+        profile_buffer.clear()
+        return Response(status=204)
@@ -0,0 +1,141 @@
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+
+from .models import LikeCount, LikedItem
+
+
+class LikeCounter:
+    """
+    Like counts served from the cache (Redis) without touching the database.
+
+    A count is the stored LikeCount base plus the pending deltas. The deltas
+    are spread over LIKE_COUNTER_SHARDS keys so a popular object's likes
+    don't all INCR one hot key. Changed objects are appended to a journal.
+    write_back() drains the journal. It recomputes those objects' counts from
+    the LikedItem rows into LikeCount and subtracts the deltas it read from the
+    shards, so a lost delta or an evicted key is corrected at the next
+    write-back.
+    """
+    prefix = 'likes'
+
+    @property
+    def shards(self):
+        return getattr(settings, 'LIKE_COUNTER_SHARDS', 8)
+
+    @property
+    def dirty_timeout(self):
+        # An object stays journaled this long, at most, if a write-back is lost
+        return getattr(settings, 'LIKE_COUNTER_DIRTY_TIMEOUT', 60 * 60)
+
+    def shard_key(self, content_type_id, object_id, shard):
+        return f'{self.prefix}:delta:{content_type_id}:{object_id}:{shard}'
+
+    def base_key(self, content_type_id, object_id):
+        return f'{self.prefix}:base:{content_type_id}:{object_id}'
+
+    def dirty_key(self, content_type_id, object_id):
+        return f'{self.prefix}:dirty:{content_type_id}:{object_id}'
+
+    @staticmethod
+    def incr(key, delta):
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            cache.add(key, 0, timeout=None)
+            return cache.incr(key, delta)
+
+    def add(self, content_type_id, object_id, delta):
+        self.incr(self.shard_key(content_type_id, object_id, random.randrange(self.shards)), delta)
+        if cache.add(self.dirty_key(content_type_id, object_id), 1, timeout=self.dirty_timeout):
+            position = self.incr(f'{self.prefix}:journal:cursor', 1)
+            cache.set(f'{self.prefix}:journal:{position}', (content_type_id, object_id), timeout=None)
+
+    def counts(self, content_type_id, object_ids):
+        """{object_id: likes} with one cache round trip, the database is read only for evicted bases."""
+        object_ids = list(object_ids)
+        keys = {}
+        for object_id in object_ids:
+            keys[self.base_key(content_type_id, object_id)] = ('base', object_id)
+            for shard in range(self.shards):
+                keys[self.shard_key(content_type_id, object_id, shard)] = ('delta', object_id)
+        values = cache.get_many(list(keys))
+
+        counts = dict.fromkeys(object_ids, 0)
+        missing = set(object_ids)
+        for key, value in values.items():
+            kind, object_id = keys[key]
+            counts[object_id] += value
+            if kind == 'base':
+                missing.discard(object_id)
+
+        if missing:
+            bases = dict.fromkeys(missing, 0)
+            bases.update(LikeCount.objects.filter(content_type_id=content_type_id, object_id__in=missing)
+                         .values_list('object_id', 'count'))
+            for object_id, count in bases.items():
+                # add, not set: a write_back() since the read may have stored a newer base
+                cache.add(self.base_key(content_type_id, object_id), count, timeout=None)
+                counts[object_id] += count
+        return counts
+
+    def write_back(self, batch_size=1000):
+        """Folds journaled objects into LikeCount, returns how many objects were written."""
+        lock = f'{self.prefix}:write_back:lock'
+        if not cache.add(lock, 1, timeout=5 * 60):
+            return 0
+        try:
+            done = cache.get(f'{self.prefix}:journal:done', 0)
+            end = cache.get(f'{self.prefix}:journal:cursor', 0)
+            written = 0
+            for start in range(done + 1, end + 1, batch_size):
+                slots = [f'{self.prefix}:journal:{position}' for position in range(start, min(start + batch_size, end + 1))]
+                objects = set(cache.get_many(slots).values())
+                written += self.write_back_objects(objects)
+                cache.delete_many(slots)
+                cache.set(f'{self.prefix}:journal:done', start + len(slots) - 1, timeout=None)
+            return written
+        finally:
+            cache.delete(lock)
+
+    def write_back_objects(self, objects):
+        if not objects:
+            return 0
+        # Later likes re-journal the object from here on
+        cache.delete_many([self.dirty_key(*obj) for obj in objects])
+
+        # Read the deltas before counting rows: a like is committed before
+        # its INCR, so every delta read here is already in the counts below.
+        shard_keys = [self.shard_key(*obj, shard) for obj in objects for shard in range(self.shards)]
+        for key, value in cache.get_many(shard_keys).items():
+            if value:
+                try:
+                    cache.decr(key, value)
+                except ValueError:
+                    pass  # evicted since the read, the rows counted below still hold its likes
+
+        by_type = {}
+        for content_type_id, object_id in objects:
+            by_type.setdefault(content_type_id, set()).add(object_id)
+
+        rows = []
+        for content_type_id, object_ids in by_type.items():
+            counted = dict.fromkeys(object_ids, 0)
+            counted.update(LikedItem.objects.filter(content_type_id=content_type_id, object_id__in=object_ids)
+                           .order_by().values('object_id').annotate(count=Count('id'))
+                           .values_list('object_id', 'count'))
+            rows += [LikeCount(content_type_id=content_type_id, object_id=object_id, count=count)
+                     for object_id, count in counted.items()]
+
+        # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target
+        unique_fields = ['content_type', 'object_id'] if connection.features.supports_update_conflicts_with_target else None
+        LikeCount.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=unique_fields, update_fields=['count', 'updated_at'])
+        cache.set_many({self.base_key(row.content_type_id, row.object_id): row.count for row in rows}, timeout=None)
+        return len(rows)
+
+
+like_counter = LikeCounter()
@@ -1,12 +1,67 @@
 from django.conf import settings
-from django.db import models
+from django.db import connection, models
+from django.db.models.constants import OnConflict
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 
 
+class LikedItemManager(models.Manager):
+    def like(self, user_id, obj_type, obj_id):
+        """
+        INSERT ... ON CONFLICT DO NOTHING (INSERT IGNORE / INSERT OR IGNORE),
+        so liking twice is a no-op. Returns True if a like was added.
+        """
+        content_type = ContentType.objects.get_for_model(obj_type)
+        ops = connection.ops
+        qn = ops.quote_name
+        fields = [self.model._meta.get_field(name) for name in ('user', 'content_type', 'object_id')]
+        sql = (
+            f'{ops.insert_statement(on_conflict=OnConflict.IGNORE)} {qn(self.model._meta.db_table)} '
+            f'({", ".join(qn(field.column) for field in fields)}) VALUES (%s, %s, %s) '
+            f'{ops.on_conflict_suffix_sql(fields, OnConflict.IGNORE, None, None)}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, content_type.id, obj_id])
+            return cursor.rowcount == 1
+
+    def unlike(self, user_id, obj_type, obj_id):
+        """Returns True if a like was removed."""
+        content_type = ContentType.objects.get_for_model(obj_type)
+        deleted, _ = self.filter(user_id=user_id, content_type=content_type, object_id=obj_id).delete()
+        return deleted > 0
+
+    def liked_ids(self, user_id, obj_type, obj_ids):
+        """The subset of obj_ids the user likes, in one query on the unique index."""
+        content_type = ContentType.objects.get_for_model(obj_type)
+        return set(self.filter(user_id=user_id, content_type=content_type, object_id__in=obj_ids)
+                   .values_list('object_id', flat=True))
+
+
 class LikedItem(models.Model):
+    objects = LikedItemManager()
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'content_type', 'object_id'], name='unique_like'),
+        ]
+        indexes = [
+            models.Index(fields=['content_type', 'object_id']),
+        ]
+
+
+class LikeCount(models.Model):
+    """Likes per object as of the last likes.counters write-back."""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_like_count'),
+        ]
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .counters import like_counter
+
+
+@shared_task
+def write_back_like_counts():
+    return like_counter.write_back()
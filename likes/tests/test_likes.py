@@ -0,0 +1,173 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from likes.counters import like_counter
+from likes.models import LikeCount, LikedItem
+from store.models import Product
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def authenticate(api_client):
+    def do_authenticate():
+        user = baker.make('core.User')
+        api_client.force_authenticate(user=user)
+        return user
+    return do_authenticate
+
+
+@pytest.fixture
+def like(api_client, django_capture_on_commit_callbacks):
+    # Counters are updated once the like is committed
+    def do_like(product, method='put'):
+        with django_capture_on_commit_callbacks(execute=True):
+            return getattr(api_client, method)(f"/likes/store.product/{product.id}/")
+    return do_like
+
+
+@pytest.mark.django_db
+class TestLikeProduct:
+
+    def test_if_anonymous_user_likes_returns_401(self, api_client):
+        product = baker.make(Product)
+
+        response = api_client.put(f"/likes/store.product/{product.id}/")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_product_is_liked_twice_it_counts_once(self, like, authenticate):
+        authenticate()
+        product = baker.make(Product)
+
+        like(product)
+        response = like(product)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'likes': 1, 'liked': True}
+        assert LikedItem.objects.count() == 1
+
+    def test_if_product_is_unliked_twice_it_counts_once(self, like, authenticate):
+        authenticate()
+        product = baker.make(Product)
+        like(product)
+
+        like(product, 'delete')
+        response = like(product, 'delete')
+
+        assert response.data == {'likes': 0, 'liked': False}
+
+    def test_if_model_is_not_likeable_returns_404(self, api_client, authenticate):
+        authenticate()
+
+        response = api_client.put("/likes/core.user/1/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_if_product_does_not_exist_returns_404(self, api_client, authenticate):
+        authenticate()
+
+        response = api_client.put("/likes/store.product/999/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestLikeLookup:
+
+    def test_if_ids_are_looked_up_returns_counts_and_users_likes(self, api_client, like, authenticate):
+        products = baker.make(Product, _quantity=3)
+        for _ in range(2):
+            authenticate()
+            like(products[0])
+        like(products[2])
+
+        response = api_client.get("/likes/store.product/", {'ids': ','.join(str(p.id) for p in products)})
+
+        assert response.data['likes'] == {products[0].id: 2, products[1].id: 0, products[2].id: 1}
+        assert response.data['liked'] == [products[0].id, products[2].id]
+
+    def test_if_too_many_ids_are_looked_up_returns_400(self, api_client):
+        response = api_client.get("/likes/store.product/", {'ids': ','.join(map(str, range(101)))})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestLikeCounterWriteBack:
+
+    def test_if_counts_are_written_back_they_survive_cache_loss(self, like, authenticate):
+        product = baker.make(Product)
+        for _ in range(3):
+            authenticate()
+            like(product)
+        content_type = ContentType.objects.get_for_model(Product)
+
+        assert like_counter.write_back() == 1
+        cache.clear()
+
+        assert LikeCount.objects.get(object_id=product.id).count == 3
+        assert like_counter.counts(content_type.id, [product.id]) == {product.id: 3}
+
+    def test_if_delta_was_lost_write_back_recounts_from_rows(self, authenticate):
+        product = baker.make(Product)
+        content_type = ContentType.objects.get_for_model(Product)
+        LikedItem.objects.like(authenticate().id, Product, product.id)
+        like_counter.add(content_type.id, product.id, 5)
+
+        like_counter.write_back()
+
+        assert like_counter.counts(content_type.id, [product.id]) == {product.id: 1}
+
+    def test_if_delta_is_evicted_during_write_back_other_counts_are_still_written(
+            self, like, authenticate, monkeypatch):
+        products = baker.make(Product, _quantity=2)
+        for product in products:
+            authenticate()
+            like(product)
+        content_type = ContentType.objects.get_for_model(Product)
+        evicted = [like_counter.shard_key(content_type.id, products[0].id, shard)
+                   for shard in range(like_counter.shards)]
+        get_many = cache.get_many
+
+        def get_many_then_evict(keys):
+            values = get_many(keys)
+            if evicted[0] in keys:
+                cache.delete_many(evicted)
+            return values
+
+        monkeypatch.setattr(cache, 'get_many', get_many_then_evict)
+        assert like_counter.write_back() == 2
+        monkeypatch.undo()
+
+        assert dict(LikeCount.objects.values_list('object_id', 'count')) == {product.id: 1 for product in products}
+
+    def test_if_base_is_written_back_during_lookup_it_is_not_overwritten(self, authenticate, monkeypatch):
+        product = baker.make(Product)
+        content_type = ContentType.objects.get_for_model(Product)
+        LikedItem.objects.like(authenticate().id, Product, product.id)
+        base_key = like_counter.base_key(content_type.id, product.id)
+        get_many = cache.get_many
+
+        def get_many_then_write_back(keys):
+            values = get_many(keys)
+            cache.set(base_key, 2, timeout=None)
+            return values
+
+        monkeypatch.setattr(cache, 'get_many', get_many_then_write_back)
+        like_counter.counts(content_type.id, [product.id])
+        monkeypatch.undo()
+
+        assert cache.get(base_key) == 2
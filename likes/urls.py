@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('<str:model>/', views.LikeLookupView.as_view()),
+    path('<str:model>/<int:object_id>/', views.LikeView.as_view()),
+]
@@ -1,3 +1,77 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .counters import like_counter
+from .models import LikedItem
+
+MAX_LOOKUP_IDS = 100
+
+
+def get_content_type(model):
+    """ContentType for an 'app_label.model' listed in LIKEABLE_MODELS, from the ContentType cache."""
+    if model not in getattr(settings, 'LIKEABLE_MODELS', []):
+        raise NotFound(f'{model} cannot be liked.')
+    app_label, model_name = model.split('.')
+    return ContentType.objects.get_by_natural_key(app_label, model_name)
+
+
+class LikeView(APIView):
+    """
+    GET the object's like count and whether the user likes it, PUT to like
+    and DELETE to unlike. PUT and DELETE are idempotent.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request, model, object_id):
+        content_type = get_content_type(model)
+        liked = request.user.is_authenticated and object_id in LikedItem.objects.liked_ids(
+            request.user.id, content_type.model_class(), [object_id])
+        return Response(self.state(content_type, object_id, liked))
+
+    def put(self, request, model, object_id):
+        content_type = get_content_type(model)
+        if not content_type.model_class()._default_manager.filter(pk=object_id).exists():
+            raise NotFound()
+        if LikedItem.objects.like(request.user.id, content_type.model_class(), object_id):
+            transaction.on_commit(lambda: like_counter.add(content_type.id, object_id, 1))
+        return Response(self.state(content_type, object_id, True))
+
+    def delete(self, request, model, object_id):
+        content_type = get_content_type(model)
+        if LikedItem.objects.unlike(request.user.id, content_type.model_class(), object_id):
+            transaction.on_commit(lambda: like_counter.add(content_type.id, object_id, -1))
+        return Response(self.state(content_type, object_id, False))
+
+    @staticmethod
+    def state(content_type, object_id, liked):
+        return {'likes': like_counter.counts(content_type.id, [object_id])[object_id], 'liked': liked}
+
+
+class LikeLookupView(APIView):
+    """
+    GET ?ids=1,2,3 returns the like counts of those objects and which of
+    them the user likes, for rendering a list page: one cache round trip
+    and one indexed query.
+    """
+
+    def get(self, request, model):
+        content_type = get_content_type(model)
+        try:
+            ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value]
+        except ValueError:
+            raise ValidationError({'ids': ['Expected a comma separated list of ids.']})
+        if len(ids) > MAX_LOOKUP_IDS:
+            raise ValidationError({'ids': [f'At most {MAX_LOOKUP_IDS} ids.']})
+
+        liked = set()
+        if request.user.is_authenticated:
+            liked = LikedItem.objects.liked_ids(request.user.id, content_type.model_class(), ids)
+        return Response({
+            'likes': like_counter.counts(content_type.id, ids),
+            'liked': sorted(liked),
+        })
@@ -1,6 +1,7 @@
 from random import randint
 from locust import HttpUser, between, task
 
+# Superseded by store_workload.py (personas, discovered ids, JSON reports)
 
 
 class WebsiteUser(HttpUser):
@@ -9,19 +10,16 @@ class WebsiteUser(HttpUser):
     @task(2)
     def view_products(self):
         collection_id = randint(2,6)
-        print("View Products")
         self.client.get(f'/store/products/?collection_id={collection_id}', name='store/products')
 
     @task(4)
     def view_product(self):
         product_id=randint(1,1000)
-        print("View Product")
         self.client.get(f'/store/products/{product_id}', name='store/products/:id')
     
     @task(1)
     def add_to_cart(self):
         product_id = randint(1,10)
-        print("Add to Cart")
         self.client.post(f'/store/carts/{self.cart_id}/items/',
             name='/store/cart/items', 
             json={'product_id':product_id, 'quantity':1}
@@ -35,5 +33,3 @@ class WebsiteUser(HttpUser):
         response = self.client.post('/store/carts/')
         result = response.json()
         self.cart_id = result['id']
-
-
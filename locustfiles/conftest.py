@@ -0,0 +1 @@
+# Puts locustfiles/ on sys.path, so the tests import workload like the locustfile does
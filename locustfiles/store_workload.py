@@ -0,0 +1,33 @@
+"""
+Store workload, see workload/__init__.py.
+
+    locust -f locustfiles/store_workload.py --host http://localhost:8000
+"""
+from locust import events
+from locust.runners import WorkerRunner
+
+from workload.catalog import catalog
+from workload.report import write_report
+from workload.users import BrowserUser, ShopperUser, StaffUser  # noqa: F401
+
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser):
+    parser.add_argument('--report', default='', help='Write p50/p95/p99 per endpoint to this JSON file')
+    parser.add_argument('--report-label', default='', help='Stored in the report, e.g. a branch or commit')
+
+
+@events.test_start.add_listener
+def discover_catalog(environment, **kwargs):
+    if not catalog.product_ids:
+        catalog.discover(environment.host)
+
+
+@events.quitting.add_listener
+def save_report(environment, **kwargs):
+    # workers only hold their own share of the stats
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    options = environment.parsed_options
+    if options and options.report:
+        write_report(environment, options.report, options.report_label)
@@ -0,0 +1,60 @@
+import random
+from collections import Counter
+
+import pytest
+
+from workload.report import compare
+from workload.zipf import ZipfSampler
+
+
+def report(**endpoints):
+    return {'endpoints': {
+        name: {'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 40, 'failure_rate': 0, **metrics}
+        for name, metrics in endpoints.items()
+    }}
+
+
+class TestCompare:
+
+    @pytest.mark.parametrize('metric, value', [('p95_ms', 23), ('p99_ms', 45), ('failure_rate', 0.02)])
+    def test_if_metric_regresses_above_threshold_it_is_flagged(self, metric, value):
+        base = report(products={})
+        new = report(products={metric: value})
+
+        assert [(endpoint, name) for endpoint, name, *_ in compare(base, new, threshold=0.1)] == [
+            ('products', metric)]
+
+    def test_if_change_is_within_threshold_nothing_is_flagged(self):
+        assert compare(report(products={}), report(products={'p95_ms': 21, 'p99_ms': 43}), threshold=0.1) == []
+
+    def test_if_endpoint_is_under_min_ms_it_is_ignored(self):
+        base = report(health={'p95_ms': 1, 'p99_ms': 1})
+        new = report(health={'p95_ms': 4, 'p99_ms': 4})
+
+        assert compare(base, new, threshold=0.1, min_ms=5) == []
+
+    def test_if_endpoint_is_new_it_is_ignored(self):
+        assert compare(report(), report(products={'p95_ms': 500})) == []
+
+
+class TestZipfSampler:
+
+    def test_if_seed_is_same_ranking_and_samples_are_same(self):
+        first = ZipfSampler(range(100), seed=3)
+        second = ZipfSampler(range(100), seed=3)
+
+        assert first.items == second.items
+        assert first.sample_many(50, random.Random(1)) == second.sample_many(50, random.Random(1))
+
+    def test_if_sampled_rank_1_is_most_popular(self):
+        sampler = ZipfSampler(range(1000), s=1.1, seed=3)
+
+        counts = Counter(sampler.sample_many(20000, random.Random(0)))
+
+        [(most_common, count)] = counts.most_common(1)
+        assert most_common == sampler.items[0]
+        assert count > counts[sampler.items[1]] > counts[sampler.items[10]]
+
+    def test_if_there_are_no_items_raises(self):
+        with pytest.raises(ValueError):
+            ZipfSampler([])
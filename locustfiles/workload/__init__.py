@@ -0,0 +1,17 @@
+"""
+Load-test workload for the store API.
+
+Personas (see users.py):
+- BrowserUser: anonymous catalogue traffic, product popularity is Zipfian
+- ShopperUser: browse → search → cart → sign up / JWT login → order history
+- StaffUser: logs in with LOCUST_STAFF_USERNAME / LOCUST_STAFF_PASSWORD,
+  places orders and works through the admin endpoints
+
+Product and collection ids are discovered from the API when the test
+starts, so the same workload runs against any dataset (e.g. one made with
+`manage.py generate_data`). Headless profiles live in profiles/ and write a
+JSON report with p50/p95/p99 per endpoint:
+
+    locust --config locustfiles/workload/profiles/baseline.conf --host http://localhost:8000
+    python locustfiles/workload/report.py compare locustfiles/reports/main.json locustfiles/reports/branch.json
+"""
@@ -0,0 +1,87 @@
+import logging
+import os
+import random
+import re
+from urllib.parse import urljoin
+
+import requests
+
+from workload.zipf import ZipfSampler
+
+logger = logging.getLogger(__name__)
+
+WORD = re.compile(r'[a-zA-Z]{4,}')
+
+
+def results(data):
+    # list endpoints are paginated or not depending on the viewset
+    return data['results'] if isinstance(data, dict) else data
+
+
+class Catalog:
+    """
+    Ids the workload picks from, discovered from the API instead of assumed.
+
+    Products are read page by page through the keyset cursor, at most
+    `max_pages` pages, so a million-product store is sampled rather than
+    walked in full. Search terms are words taken from the product titles.
+    """
+
+    def __init__(self, max_pages=None, page_size=100, zipf_s=None):
+        self.max_pages = max_pages or int(os.environ.get('LOCUST_DISCOVERY_PAGES', 50))
+        self.page_size = page_size
+        self.zipf_s = zipf_s or float(os.environ.get('LOCUST_ZIPF_S', 1.1))
+        self.collection_ids = []
+        self.product_ids = []
+        self.search_terms = []
+        self.products = None
+        self.collections = None
+
+    def discover(self, host, session=None):
+        session = session or requests.Session()
+
+        response = session.get(urljoin(host, '/store/collections/'))
+        response.raise_for_status()
+        collections = results(response.json())
+        self.collection_ids = [collection['id'] for collection in collections]
+        weights = {collection['id']: collection.get('products_count') or 0 for collection in collections}
+
+        words = set()
+        url = urljoin(host, f'/store/products/?count=false&limit={self.page_size}')
+        for _ in range(self.max_pages):
+            response = session.get(url)
+            response.raise_for_status()
+            page = response.json()
+            for product in results(page):
+                self.product_ids.append(product['id'])
+                words.update(word.lower() for word in WORD.findall(product['title']))
+            url = page.get('next') if isinstance(page, dict) else None
+            if not url:
+                break
+
+        if not self.product_ids:
+            raise RuntimeError(f'No products at {host}, load some data first (manage.py generate_data)')
+
+        self.search_terms = sorted(words)
+        self.products = ZipfSampler(self.product_ids, s=self.zipf_s, seed=1)
+        # big collections get browsed more
+        self.collections = ZipfSampler(
+            sorted(self.collection_ids, key=lambda id: weights[id], reverse=True) or [None], s=self.zipf_s)
+        logger.info('Discovered %d collections, %d products, %d search terms',
+                    len(self.collection_ids), len(self.product_ids), len(self.search_terms))
+        return self
+
+    def product(self):
+        return self.products.sample()
+
+    def products_for_cart(self, rng=random):
+        return set(self.products.sample_many(rng.randint(1, 4), rng))
+
+    def collection(self):
+        return self.collections.sample()
+
+    def search_term(self, rng=random):
+        return rng.choice(self.search_terms) if self.search_terms else 'product'
+
+
+catalog = Catalog()
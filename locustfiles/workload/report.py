@@ -0,0 +1,105 @@
+"""
+JSON report of a locust run, one entry per endpoint, and a comparison of
+two reports for regression tracking:
+
+    python locustfiles/workload/report.py compare base.json new.json --threshold 0.1
+
+exits with 1 when an endpoint's p95 or failure rate got worse by more than
+the threshold.
+"""
+import argparse
+import json
+import sys
+import time
+
+PERCENTILES = {'p50': 0.50, 'p95': 0.95, 'p99': 0.99}
+
+
+def entry_report(entry):
+    report = {
+        'requests': entry.num_requests,
+        'failures': entry.num_failures,
+        'failure_rate': round(entry.num_failures / entry.num_requests, 4) if entry.num_requests else 0,
+        'rps': round(entry.total_rps, 2),
+        'avg_ms': round(entry.avg_response_time, 1),
+        'max_ms': round(entry.max_response_time or 0, 1),
+    }
+    for name, percentile in PERCENTILES.items():
+        report[f'{name}_ms'] = entry.get_response_time_percentile(percentile) if entry.num_requests else 0
+    return report
+
+
+def build_report(environment, label=''):
+    stats = environment.stats
+    options = environment.parsed_options
+    return {
+        'label': label,
+        'host': environment.host,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'users': getattr(options, 'num_users', None),
+        'spawn_rate': getattr(options, 'spawn_rate', None),
+        'run_time': getattr(options, 'run_time', None),
+        'total': entry_report(stats.total),
+        'endpoints': {
+            f'{entry.method} {entry.name}': entry_report(entry)
+            for entry in sorted(stats.entries.values(), key=lambda entry: (entry.name, entry.method))
+        },
+    }
+
+
+def write_report(environment, path, label=''):
+    with open(path, 'w') as file:
+        json.dump(build_report(environment, label), file, indent=2, sort_keys=True)
+
+
+def compare(base, new, threshold=0.1, min_ms=5):
+    """
+    Returns [(endpoint, metric, base, new)] for every endpoint that got
+    slower or failed more often. Latencies under `min_ms` are ignored,
+    at that size the difference is noise.
+    """
+    regressions = []
+    for endpoint, after in new['endpoints'].items():
+        before = base['endpoints'].get(endpoint)
+        if before is None:
+            continue
+        for metric in ('p95_ms', 'p99_ms'):
+            if after[metric] >= min_ms and after[metric] > before[metric] * (1 + threshold):
+                regressions.append((endpoint, metric, before[metric], after[metric]))
+        if after['failure_rate'] > before['failure_rate'] + threshold / 10:
+            regressions.append((endpoint, 'failure_rate', before['failure_rate'], after['failure_rate']))
+    return regressions
+
+
+def print_comparison(base, new, out=sys.stdout):
+    out.write(f'{"endpoint":<50} {"p50":>15} {"p95":>15} {"p99":>15}\n')
+    for endpoint, after in sorted(new['endpoints'].items()):
+        before = base['endpoints'].get(endpoint, {})
+        columns = [f'{before.get(metric, "-")} → {after[metric]}' for metric in ('p50_ms', 'p95_ms', 'p99_ms')]
+        out.write(f'{endpoint:<50} {columns[0]:>15} {columns[1]:>15} {columns[2]:>15}\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    compare_parser = commands.add_parser('compare', help='Compare two reports')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown, 0.1 = 10%%')
+    compare_parser.add_argument('--min-ms', type=float, default=5)
+    args = parser.parse_args(argv)
+
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+
+    print_comparison(base, new)
+    regressions = compare(base, new, args.threshold, args.min_ms)
+    for endpoint, metric, before, after in regressions:
+        print(f'REGRESSION {endpoint} {metric}: {before} → {after}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
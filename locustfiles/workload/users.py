@@ -0,0 +1,168 @@
+import logging
+import os
+import random
+from uuid import uuid4
+
+from locust import HttpUser, SequentialTaskSet, between, task
+from locust.exception import StopUser
+
+from workload.catalog import catalog, results
+
+logger = logging.getLogger(__name__)
+
+
+class StoreUser(HttpUser):
+    abstract = True
+    wait_time = between(1, 5)
+
+    def view_collection(self):
+        collection_id = catalog.collection()
+        self.client.get(f'/store/products/?collection_id={collection_id}', name='/store/products/?collection_id')
+
+    def view_product(self):
+        self.client.get(f'/store/products/{catalog.product()}/', name='/store/products/:id')
+
+    def search(self):
+        self.client.get(f'/store/products/?search={catalog.search_term()}', name='/store/products/?search')
+
+    def new_cart(self):
+        return self.client.post('/store/carts/', name='/store/carts/').json()['id']
+
+    def fill_cart(self, cart_id):
+        for product_id in catalog.products_for_cart():
+            self.client.post(f'/store/carts/{cart_id}/items/', name='/store/carts/:id/items/',
+                             json={'product_id': product_id, 'quantity': random.randint(1, 3)})
+
+    def login(self, username, password):
+        response = self.client.post('/auth/jwt/create/', name='/auth/jwt/create/',
+                                    json={'username': username, 'password': password})
+        if response.status_code != 200:
+            return False
+        self.client.headers['Authorization'] = f'JWT {response.json()["access"]}'
+        return True
+
+
+class BrowserUser(StoreUser):
+    """Anonymous visitor that only reads the catalogue."""
+    weight = 6
+
+    @task(6)
+    def product(self):
+        self.view_product()
+
+    @task(3)
+    def collection(self):
+        self.view_collection()
+
+    @task(2)
+    def product_search(self):
+        self.search()
+
+    @task(1)
+    def collections(self):
+        self.client.get('/store/collections/', name='/store/collections/')
+
+
+class ShopperJourney(SequentialTaskSet):
+    """
+    browse → search → cart → sign up / JWT login → order history, then
+    starts over with a new cart. The account is created once per user.
+    """
+
+    @task
+    def browse(self):
+        self.client.get('/store/collections/', name='/store/collections/')
+        self.user.view_collection()
+        for _ in range(random.randint(1, 4)):
+            self.user.view_product()
+
+    @task
+    def search(self):
+        self.user.search()
+        self.user.view_product()
+
+    @task
+    def cart(self):
+        self.cart_id = self.user.new_cart()
+        self.user.fill_cart(self.cart_id)
+        self.client.get(f'/store/carts/{self.cart_id}/', name='/store/carts/:id/')
+
+    @task
+    def login(self):
+        if self.user.logged_in:
+            return
+        username, password = f'load-{uuid4().hex[:12]}', uuid4().hex
+        self.client.post('/auth/users/', name='/auth/users/', json={
+            'username': username, 'password': password, 'email': f'{username}@example.com',
+            'first_name': 'Load', 'last_name': 'Test',
+        })
+        self.user.logged_in = self.user.login(username, password)
+
+    @task
+    def order_history(self):
+        if not self.user.logged_in:
+            return
+        self.client.get('/store/customers/me/', name='/store/customers/me/')
+        self.client.get('/store/orders/', name='/store/orders/')
+
+
+class ShopperUser(StoreUser):
+    """
+    Visitor who builds a cart and signs in. Placing the order is left to
+    StaffUser because POST /store/orders/ is staff only.
+    """
+    weight = 3
+    tasks = [ShopperJourney]
+
+    def on_start(self):
+        self.logged_in = False
+
+
+class StaffUser(StoreUser):
+    """Back office: places orders, updates payments, reads reports."""
+    weight = 1
+    wait_time = between(2, 8)
+
+    def on_start(self):
+        username = os.environ.get('LOCUST_STAFF_USERNAME', 'admin')
+        password = os.environ.get('LOCUST_STAFF_PASSWORD')
+        if not password or not self.login(username, password):
+            logger.warning('Staff login failed, set LOCUST_STAFF_USERNAME and LOCUST_STAFF_PASSWORD')
+            raise StopUser()
+        self.order_ids = []
+
+    @task(4)
+    def checkout(self):
+        cart_id = self.new_cart()
+        self.fill_cart(cart_id)
+        response = self.client.post('/store/orders/', name='/store/orders/ [checkout]', json={'cart_id': cart_id})
+        if response.status_code == 200:
+            self.order_ids.append(response.json()['id'])
+
+    @task(2)
+    def mark_paid(self):
+        if self.order_ids:
+            order_id = self.order_ids.pop(0)
+            self.client.patch(f'/store/orders/{order_id}/', name='/store/orders/:id/',
+                              json={'payment_status': 'C'})
+
+    @task(2)
+    def orders(self):
+        self.client.get('/store/orders/', name='/store/orders/ [staff]')
+
+    @task(1)
+    def customers(self):
+        response = self.client.get('/store/customers/', name='/store/customers/')
+        customers = results(response.json()) if response.status_code == 200 else []
+        if customers:
+            customer_id = random.choice(customers)['id']
+            self.client.get(f'/store/customers/{customer_id}/history/', name='/store/customers/:id/history/')
+
+    @task(1)
+    def sales_report(self):
+        self.client.get('/store/reports/sales/?granularity=day&dimension=collection',
+                        name='/store/reports/sales/')
+
+    @task(1)
+    def profiler(self):
+        self.client.get('/profiler/', name='/profiler/')
@@ -0,0 +1,32 @@
+import bisect
+import itertools
+import random
+
+
+class ZipfSampler:
+    """
+    Picks items with probability proportional to 1 / rank ** s, so a few
+    items take most of the traffic and the rest form a long tail.
+
+    Items are ranked in the order given. With `seed` they are shuffled (the
+    same way every run) first, otherwise the most popular products would
+    always be the ones with the lowest ids.
+    """
+
+    def __init__(self, items, s=1.0, seed=None):
+        self.items = list(items)
+        if not self.items:
+            raise ValueError('ZipfSampler needs at least one item')
+        if seed is not None:
+            random.Random(seed).shuffle(self.items)
+        self.cumulative = list(itertools.accumulate(1 / rank ** s for rank in range(1, len(self.items) + 1)))
+
+    def __len__(self):
+        return len(self.items)
+
+    def sample(self, rng=random):
+        point = rng.random() * self.cumulative[-1]
+        return self.items[min(bisect.bisect(self.cumulative, point), len(self.items) - 1)]
+
+    def sample_many(self, k, rng=random):
+        return [self.sample(rng) for _ in range(k)]
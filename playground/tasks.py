@@ -1,22 +1,78 @@
-import time
-from templated_mail.mail import BaseEmailMessage
-from celery import shared_task
+import logging
+import smtplib
 
-from django.core.mail import send_mail
+from celery import group, shared_task
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
 from templated_mail.mail import BaseEmailMessage
 
+from store.models import Customer
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CUSTOMERS_CHUNK_SIZE = getattr(settings, 'NOTIFY_CUSTOMERS_CHUNK_SIZE', 500)
+# Chunks per worker, in Celery's "n/s", "n/m" or "n/h" notation
+NOTIFY_CUSTOMERS_RATE_LIMIT = getattr(settings, 'NOTIFY_CUSTOMERS_RATE_LIMIT', '30/m')
+
+
 @shared_task
 def notify_customers(args):
-    # send multiple emails
-    print(f"args received {args}")
-    print("sending multiple emails")
-    
-    message = BaseEmailMessage(template_name="email/hello.html", context={"name":"Tanjiro"})
-    message.send(["tanjiro_email_from_background_tasks@gmail.com"])
+    """Splits the customer table into id ranges and mails each range in its own task."""
+    logger.info("Notifying customers: %s", args)
+
+    ranges = list(customer_id_ranges(NOTIFY_CUSTOMERS_CHUNK_SIZE))
+    group(send_customer_notifications.s(first_id, last_id) for first_id, last_id in ranges).apply_async()
+
+    logger.info("Queued %s notification chunks", len(ranges))
+    return len(ranges)
+
+
+@shared_task(
+    rate_limit=NOTIFY_CUSTOMERS_RATE_LIMIT,
+    # Only errors raised before anything was sent, so a retry can't mail anyone twice
+    autoretry_for=(smtplib.SMTPConnectError, ConnectionRefusedError),
+    retry_backoff=True,
+    max_retries=5,
+)
+def send_customer_notifications(first_id, last_id):
+    recipients = list(
+        Customer.objects.filter(id__range=(first_id, last_id))
+        .exclude(user__email='')
+        .values_list('user__email', flat=True)
+    )
+    if not recipients:
+        return 0
+
+    template = BaseEmailMessage(template_name="email/hello.html", context={"name": "there"})
+    template.render()
+
+    messages = []
+    for email in recipients:
+        message = EmailMultiAlternatives(
+            template.subject, template.body, settings.DEFAULT_FROM_EMAIL, [email],
+            alternatives=template.alternatives)
+        message.content_subtype = template.content_subtype
+        messages.append(message)
 
+    with get_connection() as connection:
+        sent = connection.send_messages(messages)
 
-    send_mail("subject", "message", "commercialstreet@gmail.com", ["bob_email_bg_task@gmail.com"])
+    logger.info("Sent %s notifications to customers %s-%s", sent, first_id, last_id)
+    return sent
 
-    time.sleep(10)
 
-    print("sent multiple emails to user successfully")
\ No newline at end of file
+def customer_id_ranges(chunk_size):
+    """Yields (first_id, last_id) covering chunk_size customers each, streaming the ids."""
+    ids = Customer.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=chunk_size)
+    first_id = last_id = None
+    count = 0
+    for customer_id in ids:
+        if first_id is None:
+            first_id = customer_id
+        last_id = customer_id
+        count += 1
+        if count == chunk_size:
+            yield first_id, last_id
+            first_id, count = None, 0
+    if first_id is not None:
+        yield first_id, last_id
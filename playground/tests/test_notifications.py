@@ -0,0 +1,84 @@
+import pytest
+from celery import group
+from django.core import mail
+from model_bakery import baker
+
+from commercialstreet.celery import celery
+from playground import tasks
+from playground.tasks import customer_id_ranges, notify_customers, send_customer_notifications
+
+
+@pytest.fixture(autouse=True)
+def eager_celery():
+    celery.conf.task_always_eager = True
+    yield
+    celery.conf.task_always_eager = False
+
+
+@pytest.fixture
+def make_customers():
+    def do_make_customers(count, **user):
+        return [baker.make('core.User', **user).customer.id for _ in range(count)]
+    return do_make_customers
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+
+    def get_connection(*args, **kwargs):
+        connection = mail.get_connection(*args, **kwargs)
+        opened.append(connection)
+        return connection
+
+    monkeypatch.setattr(tasks, 'get_connection', get_connection)
+    return opened
+
+
+@pytest.mark.django_db
+class TestCustomerIdRanges:
+
+    def test_if_last_chunk_is_partial_it_ends_at_last_id(self, make_customers):
+        ids = make_customers(5)
+
+        assert list(customer_id_ranges(2)) == [(ids[0], ids[1]), (ids[2], ids[3]), (ids[4], ids[4])]
+
+    def test_if_customers_fill_whole_chunks_no_empty_range_is_added(self, make_customers):
+        ids = make_customers(4)
+
+        assert list(customer_id_ranges(2)) == [(ids[0], ids[1]), (ids[2], ids[3])]
+
+    def test_if_there_are_no_customers_there_are_no_ranges(self):
+        assert list(customer_id_ranges(2)) == []
+
+
+@pytest.mark.django_db
+class TestNotifyCustomers:
+
+    def test_if_chunk_is_sent_it_uses_one_connection(self, make_customers, connections):
+        ids = make_customers(3)
+        make_customers(1, email='')  # skipped
+
+        sent = send_customer_notifications(ids[0], ids[-1] + 1)
+
+        assert sent == 3
+        assert len(mail.outbox) == 3
+        assert len(connections) == 1
+
+    def test_if_customers_are_notified_group_is_built_from_id_ranges(self, make_customers, connections, monkeypatch):
+        ids = make_customers(5)
+        monkeypatch.setattr(tasks, 'NOTIFY_CUSTOMERS_CHUNK_SIZE', 2)
+        queued = []
+
+        def record_group(signatures):
+            signatures = list(signatures)
+            queued.extend(signature.args for signature in signatures)
+            return group(signatures)
+
+        monkeypatch.setattr(tasks, 'group', record_group)
+
+        assert notify_customers.delay('hello').get() == 3
+
+        assert queued == [(ids[0], ids[1]), (ids[2], ids[3]), (ids[4], ids[4])]
+        assert len(mail.outbox) == 5
+        assert len(connections) == 3
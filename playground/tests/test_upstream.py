@@ -0,0 +1,121 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.core.cache import cache
+
+from playground.upstream import CircuitBreaker, UpstreamClient, UpstreamUnavailable
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.calls += 1
+        time.sleep(self.server.delay)
+        body = json.dumps({"call": self.server.calls}).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.calls, server.delay, server.status = 0, 0, 200
+    server.url = f"http://127.0.0.1:{server.server_port}/delay"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+class TestUpstreamClient:
+
+    def test_if_misses_are_concurrent_upstream_is_called_once(self, stub_server):
+        stub_server.delay = 0.2
+        client = UpstreamClient()
+
+        async def fetch_many():
+            return await asyncio.gather(*[client.get_json(stub_server.url) for _ in range(10)])
+
+        results = asyncio.run(fetch_many())
+
+        assert stub_server.calls == 1
+        assert results == [{"call": 1}] * 10
+
+    def test_if_entry_is_stale_it_is_served_and_refreshed(self, stub_server):
+        client = UpstreamClient(fresh_ttl=0)
+
+        async def fetch_twice():
+            first = await client.get_json(stub_server.url)
+            second = await client.get_json(stub_server.url)
+            await asyncio.sleep(0.2)
+            return first, second
+
+        first, second = asyncio.run(fetch_twice())
+
+        assert first == second == {"call": 1}
+        assert stub_server.calls == 2
+        assert cache.get(client.cache_key(stub_server.url))['data'] == {"call": 2}
+
+    def test_if_request_loop_closes_background_refresh_still_runs(self, stub_server):
+        # Under WSGI every request gets its own loop, closed when it returns
+        client = UpstreamClient(fresh_ttl=0)
+
+        asyncio.run(client.get_json(stub_server.url))
+        stale = asyncio.run(client.get_json(stub_server.url))
+        time.sleep(0.3)
+
+        assert stale == {"call": 1}
+        assert cache.get(client.cache_key(stub_server.url))['data'] == {"call": 2}
+        client.close()
+
+    def test_if_requests_run_on_different_loops_connection_pool_is_shared(self, stub_server):
+        client = UpstreamClient()
+
+        asyncio.run(client.get_json(stub_server.url))
+        pool = client.client
+        cache.clear()
+        asyncio.run(client.get_json(stub_server.url))
+
+        assert client.client is pool
+        assert stub_server.calls == 2
+        client.close()
+
+    def test_if_upstream_keeps_failing_circuit_opens(self, stub_server):
+        stub_server.status = 500
+        client = UpstreamClient(breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+        async def fetch():
+            with pytest.raises(UpstreamUnavailable):
+                await client.get_json(stub_server.url)
+
+        for _ in range(4):
+            asyncio.run(fetch())
+
+        assert stub_server.calls == 2
+        assert client.breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.django_db
+class TestSayHello:
+
+    def test_if_upstream_is_reachable_returns_200(self, client, settings, stub_server):
+        settings.HTTPBIN_URL = stub_server.url
+
+        response = client.get("/playground/hello/")
+
+        assert response.status_code == 200
+        assert b"call" in response.content
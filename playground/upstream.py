@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds. After that one trial call is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """
+    Cached, non-blocking JSON client for a slow upstream.
+
+    - requests run on the client's own event loop in a daemon thread, so
+      there is one pooled httpx.AsyncClient per process and background
+      refreshes outlive the request that started them. Under WSGI every
+      request runs on a new, short-lived loop; callers only await the result
+    - concurrent misses for the same URL share a single upstream request
+    - responses are cached in Redis; after `fresh_ttl` they are still served
+      for up to `stale_ttl` while a background request refreshes them
+    - a circuit breaker stops calling an upstream that keeps failing, stale
+      data is served meanwhile when there is any
+    """
+
+    def __init__(self, fresh_ttl=5 * 60, stale_ttl=60 * 60, timeout=5.0, breaker=None):
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.lock = threading.Lock()
+        self.pid = None
+        self.loop = None
+        self.client = None
+        self.inflight = {}
+        self.background = set()
+
+    def get_loop(self):
+        # Threads don't survive a fork, so each (gunicorn) worker starts its own
+        with self.lock:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.loop = asyncio.new_event_loop()
+                self.client = None
+                self.inflight = {}
+                self.background = set()
+                threading.Thread(target=self.loop.run_forever, name='upstream-client', daemon=True).start()
+            return self.loop
+
+    def get_client(self):
+        # Only called on self.loop, which the AsyncClient is bound to
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self.client
+
+    def close(self):
+        """Closes the connection pool and stops the client's loop."""
+        if self.pid != os.getpid():
+            return
+        if self.client is not None:
+            asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result(timeout=self.timeout)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.pid = None
+
+    def cache_key(self, url):
+        return f'playground:upstream:{url}'
+
+    async def get_json(self, url):
+        future = asyncio.run_coroutine_threadsafe(self._get_json(url), self.get_loop())
+        return await asyncio.wrap_future(future)
+
+    async def _get_json(self, url):
+        entry = await cache.aget(self.cache_key(url))
+        if entry is not None:
+            if time.time() - entry['fetched_at'] >= self.fresh_ttl:
+                self.refresh_in_background(url)
+            return entry['data']
+        return await self.fetch(url)
+
+    def refresh_in_background(self, url):
+        task = asyncio.ensure_future(self.fetch(url))
+        # the loop only keeps weak references to its tasks
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+        task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def fetch(self, url):
+        client = self.get_client()
+        future = self.inflight.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(client, url))
+            self.inflight[url] = future
+            future.add_done_callback(lambda _: self.inflight.pop(url, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, client, url):
+        if not self.breaker.allow():
+            raise UpstreamUnavailable(f'Circuit open for {url}')
+
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, ValueError) as error:
+            self.breaker.record_failure()
+            logger.warning('Upstream %s failed: %r', url, error)
+            raise UpstreamUnavailable(str(error)) from error
+
+        self.breaker.record_success()
+        await cache.aset(self.cache_key(url), {'data': data, 'fetched_at': time.time()}, timeout=self.stale_ttl)
+        return data
+
+
+httpbin = UpstreamClient(
+    fresh_ttl=getattr(settings, 'UPSTREAM_FRESH_TTL', 5 * 60),
+    stale_ttl=getattr(settings, 'UPSTREAM_STALE_TTL', 60 * 60),
+)
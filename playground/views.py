@@ -1,5 +1,6 @@
 
 import datetime
+from django.conf import settings
 from django.core.cache import cache
 from django.shortcuts import render
 from django.http import HttpResponse
@@ -9,14 +10,14 @@ from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 from django.core.mail import  send_mail,mail_admins, EmailMessage
 from django.utils.decorators import method_decorator
+from django.views import View
 from django.views.decorators.cache import cache_page
-import requests
-from rest_framework.views import APIView
 from templated_mail.mail import BaseEmailMessage
 import logging
 
 
 from .tasks import notify_customers
+from .upstream import UpstreamUnavailable, httpbin
 from store.models import Cart, CartItem, Collection, Customer, Order, OrderItem, Product
 from tags.models import TaggedItem
 # Create your views here.
@@ -24,18 +25,23 @@ from tags.models import TaggedItem
 logger = logging.getLogger(__name__)
 
 # Caching the views
-class HelloView(APIView):
-    @method_decorator(cache_page(5*60)) 
-    def get(request):
-        response = requests.get("https://httpbin.org/delay/2")
-        data = response.json()
+# The upstream call is awaited, so with ASGI (commercialstreet.asgi) a slow
+# httpbin no longer pins a worker; see playground.upstream for the caching.
+class HelloView(View):
+    async def get(self, request):
+        return await render_hello(request)
 
-        return render(request, "hello.html", {"name":data})
+
+async def render_hello(request):
+    try:
+        data = await httpbin.get_json(settings.HTTPBIN_URL)
+    except UpstreamUnavailable:
+        logger.critical("httpbin is offline")
+        return render(request, "hello.html", {"name": None}, status=503)
+    return render(request, "hello.html", {"name": data})
 
 
-# caching the api fns
-@cache_page(5*60)
-def say_hello(request):
+async def say_hello(request):
     # products = Product.objects.filter(collection__id=3)
     # customers = Customer.objects.filter(email__icontains='com')
 
@@ -257,11 +263,4 @@ def say_hello(request):
     #     data = response.json()
     #     cache.set(key, data)
 
-    try:
-        logger.info("Calling httpbin")
-        response = requests.get("https://httpbin.org/delay/2")
-        logger.info("httpbin response success")
-        data = response.json()
-    except requests.ConnectionError:
-        logger.critical("httpbin is offline")
-    return render(request, "hello.html", {"name":data})
\ No newline at end of file
+    return await render_hello(request)
\ No newline at end of file
@@ -1,10 +1,10 @@
 from django.contrib import admin
-from django.db.models import Count
 from django.utils.html import urlencode,format_html
 from django.urls import reverse
 from django.contrib.contenttypes.admin import GenericTabularInline
 
 from . import models
+from .exports import export_response
 
 class InventoryFilter(admin.SimpleListFilter):
     title = 'inventory'
@@ -39,7 +39,7 @@ class ProductAdmin(admin.ModelAdmin):
         "slug":['title']
     }
     autocomplete_fields = ['collection']
-    actions=['clear_inventory']
+    actions=['clear_inventory', 'export_csv', 'export_jsonl']
     inlines=[ProductImageInline]
     list_display = ['title','unit_price','inverntory_status',"collection_title"]
     list_editable = ['unit_price']
@@ -63,6 +63,14 @@ class ProductAdmin(admin.ModelAdmin):
         self.message_user(
             request, 
             f'{count} products updated successfully')
+
+    @admin.action(description="Export selected products as CSV")
+    def export_csv(self, request, queryset):
+        return export_response('product', queryset, 'csv')
+
+    @admin.action(description="Export selected products as JSONL")
+    def export_jsonl(self, request, queryset):
+        return export_response('product', queryset, 'jsonl')
     
     class Media:
         css = {
@@ -76,29 +84,27 @@ class CustomerAdmin(admin.ModelAdmin):
     list_editable = ['membership']
     list_per_page = 10
     search_fields=['first_name__istartswith', 'last_name__istartswith']
-    list_select_related = ['user']
+    list_select_related = ['user', 'order_summary']
 
-    @admin.display(ordering='order')
+    @admin.display(ordering='order_summary__orders_count')
     def total_orders(self, customer):
         url = reverse('admin:store_order_changelist') + "?" + urlencode({
             'customer__id':customer.id
         })
-        return format_html('<a href={}>{}</a>',url , customer.total_orders)
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(total_orders=Count('order'))
+        summary = getattr(customer, 'order_summary', None)
+        return format_html('<a href={}>{}</a>',url , summary.orders_count if summary else 0)
 
 
 
 
 @admin.register(models.Collection)
 class CollectionAdmin(admin.ModelAdmin):
-    list_display = ['title','product_count']
+    list_display = ['title','product_count','tax_rate']
     list_per_page = 10
     ordering = ['title']
     search_fields = ['title']
 
-    @admin.display(ordering='product_count')
+    @admin.display(ordering='products_count')
     def product_count(self,collection):
         url = (reverse('admin:store_product_changelist')
                + '?' 
@@ -106,12 +112,7 @@ class CollectionAdmin(admin.ModelAdmin):
                    'collection__id' : str(collection.id)
                })
                )
-        return format_html('<a href="{}">{}</a>', url,collection.product_count)
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            product_count=Count('products')
-        )
+        return format_html('<a href="{}">{}</a>', url,collection.products_count)
 
 class OrderInlineItem(admin.TabularInline):
     model = models.OrderItem
@@ -128,4 +129,13 @@ class OrderAdmin(admin.ModelAdmin):
     list_select_related = ['customer']
     inlines= [OrderInlineItem]
     ordering = ['customer']
+    actions = ['export_csv', 'export_items_csv']
+
+    @admin.action(description="Export selected orders as CSV")
+    def export_csv(self, request, queryset):
+        return export_response('order', queryset, 'csv')
+
+    @admin.action(description="Export items of selected orders as CSV")
+    def export_items_csv(self, request, queryset):
+        return export_response('orderitem', models.OrderItem.objects.filter(order__in=queryset.values('id')), 'csv')
 
@@ -0,0 +1,115 @@
+"""
+Latency and query-count benchmarks for the hot store endpoints on
+generated data. Not collected by a plain `pytest` run (the file name
+doesn't match test_*.py); run it explicitly:
+
+    pytest store/benchmarks/bench_endpoints.py
+    STORE_BENCH_SCALES=1000,100000,1000000 pytest store/benchmarks/bench_endpoints.py --benchmark-autosave
+
+Each scale is a product count; the other tables grow with it. A test fails
+when an endpoint runs more queries than its entry in QUERY_BUDGETS, so
+N+1 regressions fail the suite whatever the timings.
+"""
+import os
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from store.models import Cart, CartItem
+from store.synthetic import SyntheticData
+
+pytest.importorskip('pytest_benchmark')
+
+SCALES = [int(scale) for scale in os.environ.get('STORE_BENCH_SCALES', '1000').split(',')]
+
+# Queries per request; lower them when an endpoint gets cheaper
+QUERY_BUDGETS = {
+    'product_list': 4,
+    'product_detail': 3,
+    'collection_list': 2,
+    'cart_get': 2,
+    'add_to_cart': 1,
+    'checkout': 18,
+}
+
+
+@pytest.fixture(scope='module', params=SCALES, ids=lambda scale: f'{scale}_products')
+def dataset(request, django_db_setup, django_db_blocker):
+    products = request.param
+    with django_db_blocker.unblock():
+        data = SyntheticData(seed=42).generate(
+            collections=max(10, products // 1000), products=products, customers=max(100, products // 100),
+            carts=100, orders=max(500, products // 10))
+        yield data
+        call_command('flush', interactive=False, verbosity=0)
+
+
+@pytest.fixture(autouse=True)
+def uncached(settings):
+    # Measure the views, not the product response cache
+    settings.STORE_PRODUCT_CACHE_TIMEOUT = 0
+    settings.QUERY_PROFILER_SAMPLE_RATE = 0
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def measure(benchmark, api_client):
+    def do_measure(name, request, setup=None):
+        # first request warms per-process caches (content types, permissions)
+        request(api_client, *(setup() if setup else ()))
+        args = setup() if setup else ()
+        with CaptureQueriesContext(connection) as queries:
+            response = request(api_client, *args)
+        assert response.status_code < 400, response.content
+        assert len(queries) <= QUERY_BUDGETS[name], '\n'.join(query['sql'] for query in queries)
+
+        if setup:
+            benchmark.pedantic(request, setup=lambda: ((api_client, *setup()), {}), rounds=20)
+        else:
+            benchmark(request, api_client)
+        benchmark.extra_info['queries'] = len(queries)
+    return do_measure
+
+
+@pytest.mark.django_db
+class TestEndpointBenchmarks:
+
+    def test_product_list(self, dataset, measure):
+        measure('product_list', lambda client: client.get('/store/products/'))
+
+    def test_product_detail(self, dataset, measure):
+        product_id = dataset['products'][len(dataset['products']) // 2]
+        measure('product_detail', lambda client: client.get(f'/store/products/{product_id}/'))
+
+    def test_collection_list(self, dataset, measure):
+        measure('collection_list', lambda client: client.get('/store/collections/'))
+
+    def test_cart_get(self, dataset, measure):
+        cart_id = dataset['carts'][0]
+        measure('cart_get', lambda client: client.get(f'/store/carts/{cart_id}/'))
+
+    def test_add_to_cart(self, dataset, measure):
+        product_id = dataset['products'][0]
+        measure('add_to_cart', lambda client, cart_id: client.post(
+            f'/store/carts/{cart_id}/items/', {'product_id': product_id, 'quantity': 1}),
+            setup=lambda: (Cart.objects.create().id,))
+
+    def test_checkout(self, dataset, measure, api_client):
+        api_client.force_authenticate(user=baker.make('core.User', is_staff=True))
+        products = dataset['products']
+
+        def new_cart():
+            cart = Cart.objects.create()
+            CartItem.objects.bulk_create([CartItem(cart=cart, product_id=products[i], quantity=1) for i in range(3)])
+            return (cart.id,)
+
+        measure('checkout', lambda client, cart_id: client.post('/store/orders/', {'cart_id': cart_id}),
+                setup=new_cart)
@@ -0,0 +1,130 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ProductCache:
+    """
+    Read-through cache for the product list and detail responses.
+
+    Every entry key embeds the current value of a version counter, so entries
+    are never deleted: bumping the counter makes the old keys unreachable and
+    they expire on their own. Scopes are `all` (every unfiltered list),
+    `collection:<id>` (lists filtered by collection), `product:<id>` (the
+    detail response) and `details` (every detail response, for bulk changes
+    such as a new tax rate).
+    """
+    prefix = 'store:products'
+    list_params = [
+        'collection_id', 'unit_price__gt', 'unit_price__lt', 'search',
+        'ordering', 'limit', 'offset', 'cursor', 'count',
+    ]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'STORE_PRODUCT_CACHE_TIMEOUT', 10 * 60)
+
+    def version_key(self, scope):
+        return f'{self.prefix}:version:{scope}'
+
+    def get_version(self, scope):
+        return self.get_versions(scope)[0]
+
+    def get_versions(self, *scopes):
+        keys = [self.version_key(scope) for scope in scopes]
+        versions = cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # Seed from the clock so a counter evicted from Redis never
+                # comes back at a value that old entries were stored under.
+                cache.add(key, time.time_ns(), timeout=None)
+                versions[key] = cache.get(key)
+        return [versions[key] for key in keys]
+
+    def bump(self, *scopes):
+        for scope in set(scopes):
+            try:
+                cache.incr(self.version_key(scope))
+            except ValueError:
+                cache.set(self.version_key(scope), time.time_ns(), timeout=None)
+
+    def invalidate(self, *scopes):
+        # Bump now so reads inside this transaction miss, and again after the
+        # commit so a concurrent read of the old rows can't stay cached.
+        self.bump(*scopes)
+        transaction.on_commit(lambda: self.bump(*scopes))
+
+    def list_key(self, request):
+        collection_id = request.query_params.get('collection_id')
+        scope = f'collection:{collection_id}' if collection_id else 'all'
+        params = '&'.join(
+            f'{name}={request.query_params.get(name)}'
+            for name in self.list_params if name in request.query_params
+        )
+        digest = hashlib.md5(f'{request.get_host()}?{params}'.encode('utf-8')).hexdigest()
+        return f'{self.prefix}:list:{self.get_version(scope)}:{digest}'
+
+    def detail_key(self, pk):
+        product_version, details_version = self.get_versions(f'product:{pk}', 'details')
+        return f'{self.prefix}:detail:{pk}:{product_version}:{details_version}'
+
+    def read_through(self, key, get_response):
+        data = cache.get(key)
+        if data is not None:
+            self.count('hits')
+            return Response(data)
+
+        self.count('misses')
+        response = get_response()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=self.timeout)
+        return response
+
+    def count(self, name):
+        key = f'{self.prefix}:stats:{name}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+    def stats(self):
+        values = cache.get_many([f'{self.prefix}:stats:hits', f'{self.prefix}:stats:misses'])
+        hits = values.get(f'{self.prefix}:stats:hits', 0)
+        misses = values.get(f'{self.prefix}:stats:misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+
+
+product_cache = ProductCache()
+
+
+def customer_id_key(user_id):
+    return f'store:customer_id:{user_id}'
+
+
+def get_customer_id(user_id):
+    """
+    The id of the user's Customer, or None. Cached per user since it never
+    changes; create_customer_for_new_user and Customer deletes clear it.
+    """
+    from .models import Customer
+
+    key = customer_id_key(user_id)
+    customer_id = cache.get(key)
+    if customer_id is None:
+        customer_id = Customer.objects.filter(user_id=user_id).values_list('id', flat=True).first()
+        if customer_id is not None:
+            cache.set(key, customer_id, timeout=getattr(settings, 'STORE_CUSTOMER_ID_CACHE_TIMEOUT', 24 * 60 * 60))
+    return customer_id
+
+
+def forget_customer_id(user_id):
+    cache.delete(customer_id_key(user_id))
@@ -0,0 +1,234 @@
+import csv
+import json
+import os
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .cache import product_cache
+from .models import Collection, Product, Promotion
+from .tax import calculate_price_with_tax, refresh_prices_with_tax
+
+MODELS = {
+    'collection': Collection,
+    'product': Product,
+    'promotion': Promotion,
+}
+# Columns an input row may have, besides id
+COLUMNS = {
+    'collection': ['title', 'tax_rate', 'featured_product_id'],
+    'product': ['title', 'slug', 'description', 'unit_price', 'inventory', 'collection_id', 'promotions'],
+    'promotion': ['description', 'discount'],
+}
+
+
+def read_rows(path, format=None):
+    """Yields the input rows as dicts, one line at a time. CSV files need a header row."""
+    format = format or ('csv' if path.endswith('.csv') else 'jsonl')
+    with open(path, newline='', encoding='utf-8') as file:
+        if format == 'csv':
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def build_objects(model_name, rows):
+    """Model instances for the rows, with values converted by each field's to_python."""
+    model = MODELS[model_name]
+    objects = []
+    for row in rows:
+        if not row.get('id'):
+            raise CommandError(f'{model.__name__} row without an id: {row}')
+        values = {'id': int(row['id'])}
+        for column in COLUMNS[model_name]:
+            if column not in row or column == 'promotions':
+                continue
+            field = model._meta.get_field(column.removesuffix('_id'))
+            value = row[column]
+            if value == '' and field.null:
+                value = None
+            try:
+                values[field.attname] = field.to_python(value)
+            except ValidationError as error:
+                raise CommandError(f'{model.__name__} row {values["id"]} has an invalid {column}: {error.messages[0]}')
+        objects.append(model(**values))
+    return objects
+
+
+def fill_omitted_columns(model_name, objects, rows):
+    """
+    Copies the columns a row leaves out from the stored row. The upsert
+    INSERTs every column before it resolves the conflict, so a partial row
+    would otherwise write defaults, or NULLs, over a stored product.
+    """
+    model = MODELS[model_name]
+    fields = {column: model._meta.get_field(column.removesuffix('_id'))
+              for column in COLUMNS[model_name] if column != 'promotions'}
+    partial = [(obj, [column for column in fields if column not in row]) for obj, row in zip(objects, rows)]
+    partial = [(obj, omitted) for obj, omitted in partial if omitted]
+    if not partial:
+        return
+    attnames = [field.attname for field in fields.values()]
+    stored = {row[0]: dict(zip(attnames, row[1:])) for row in model.objects
+              .filter(id__in=[obj.id for obj, _ in partial]).values_list('id', *attnames)}
+
+    for obj, omitted in partial:
+        for column in omitted:
+            field = fields[column]
+            if obj.id in stored:
+                setattr(obj, field.attname, stored[obj.id][field.attname])
+            elif not field.null and getattr(obj, field.attname) is None:
+                raise CommandError(f'{model.__name__} row {obj.id} has no {column}')
+
+
+def promotion_links(rows):
+    """
+    Links for the rows that have a promotions column. The caller deletes
+    these products' current links first, so promotions left out of a row
+    are unlinked.
+    """
+    links = []
+    for row in rows:
+        if 'promotions' not in row:
+            continue
+        promotions = row['promotions']
+        if isinstance(promotions, str):
+            promotions = [value for value in promotions.split(';') if value]
+        for promotion_id in promotions or []:
+            links.append(Product.promotions.through(product_id=int(row['id']), promotion_id=int(promotion_id)))
+    return links
+
+
+def import_batch(model_name, rows):
+    """
+    Upserts one batch of rows in its own transaction with
+    bulk_create(update_conflicts=True). Signal handlers don't run for bulk
+    writes, so price_with_tax is computed here and the ids of the touched
+    collections are returned for recount_products(), which the caller runs
+    once the whole input is imported.
+    """
+    objects = build_objects(model_name, rows)
+    model = MODELS[model_name]
+    update_fields = sorted({
+        MODELS[model_name]._meta.get_field(column.removesuffix('_id')).name
+        for row in rows for column in COLUMNS[model_name] if column in row and column != 'promotions'
+    })
+    touched = set()
+
+    with transaction.atomic():
+        fill_omitted_columns(model_name, objects, rows)
+        if model_name == 'product':
+            touched.update(set_prices_with_tax(objects))
+            update_fields += ['price_with_tax', 'last_update']
+        elif model_name == 'collection':
+            previous_rates = dict(Collection.objects.filter(id__in=[collection.id for collection in objects])
+                                  .values_list('id', 'tax_rate'))
+
+        upsert(model, objects, update_fields)
+
+        if model_name == 'product':
+            links = Product.promotions.through.objects
+            links.filter(product_id__in=[int(row['id']) for row in rows if 'promotions' in row]).delete()
+            links.bulk_create(promotion_links(rows), ignore_conflicts=True)
+        elif model_name == 'collection' and 'tax_rate' in update_fields:
+            # products of re-rated collections keep their old price_with_tax otherwise
+            changed = [collection.id for collection in objects
+                       if collection.id in previous_rates and previous_rates[collection.id] != collection.tax_rate]
+            if changed:
+                refresh_prices_with_tax(changed)
+
+    if model_name == 'product':
+        product_cache.bump('all', 'details',
+                           *[f'collection:{collection_id}' for collection_id in touched])
+    elif model_name == 'collection':
+        product_cache.bump('all', *[f'collection:{collection.id}' for collection in objects])
+    return touched
+
+
+def set_prices_with_tax(products):
+    """
+    Sets price_with_tax on the products about to be upserted and returns the
+    ids of their old and new collections.
+    """
+    stored = dict(Product.objects.filter(id__in=[product.id for product in products])
+                  .values_list('id', 'collection_id'))
+    touched = set(stored.values()) | {product.collection_id for product in products}
+    rates = dict(Collection.objects.filter(id__in=touched).values_list('id', 'tax_rate'))
+
+    for product in products:
+        if product.collection_id not in rates:
+            raise CommandError(f'Product row {product.id} has unknown collection_id {product.collection_id}')
+        product.price_with_tax = calculate_price_with_tax(product.unit_price, rates[product.collection_id])
+    return touched
+
+
+def upsert(model, objects, update_fields):
+    if not update_fields:
+        model.objects.bulk_create(objects, ignore_conflicts=True)
+        return
+    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target
+    unique_fields = ['id'] if connection.features.supports_update_conflicts_with_target else None
+    model.objects.bulk_create(objects, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields)
+
+
+def reset_sequences(*models):
+    """Moves PostgreSQL id sequences past rows inserted with explicit ids (a no-op elsewhere)."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def recount_products(collection_ids):
+    counts = (Product.objects.filter(collection=OuterRef('pk'))
+              .order_by().values('collection').annotate(count=Count('id')).values('count'))
+    Collection.objects.filter(id__in=collection_ids).update(products_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Checkpoint:
+    """
+    Number of leading input rows already imported, kept in a file next to
+    the input. Batches may finish out of order, so only the contiguous
+    prefix of finished batches is recorded. The ids of the collections
+    that finished batches touched are kept too, so a resumed run still
+    recounts the ones a failed run imported into.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.finished = {}
+
+    def read(self):
+        try:
+            with open(self.path) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {'rows': 0, 'collections': []}
+
+    def load(self):
+        return self.read()['rows']
+
+    def touched(self):
+        return set(self.read().get('collections', []))
+
+    def save(self, start, end, touched=()):
+        self.finished[start] = end
+        state = self.read()
+        done = state['rows']
+        while done in self.finished:
+            done = self.finished.pop(done)
+        collections = sorted(set(state.get('collections', [])) | set(touched))
+        with open(self.path + '.tmp', 'w') as file:
+            json.dump({'rows': done, 'collections': collections}, file)
+        os.replace(self.path + '.tmp', self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
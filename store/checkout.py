@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .cache import product_cache
+from .models import Cart, CartItem, Order, OrderItem, Product
+
+
+class InsufficientInventory(Exception):
+    def __init__(self, products):
+        # [(product_id, requested, available)]
+        self.products = products
+        super().__init__(f'Insufficient inventory for products {[product[0] for product in products]}')
+
+
+def place_order(cart_id, customer_id):
+    """
+    Turns the cart into an order and reserves the inventory for it.
+
+    The product rows are locked in id order, so two checkouts sharing
+    products always lock them in the same sequence and can't deadlock. The
+    whole order is rejected with InsufficientInventory if any product would
+    be oversold.
+    """
+    with transaction.atomic():
+        quantities = dict(CartItem.objects.filter(cart_id=cart_id).values_list('product_id', 'quantity'))
+
+        products = list(
+            Product.objects.select_for_update()
+            .filter(id__in=quantities)
+            .order_by('id')
+            .values_list('id', 'unit_price', 'inventory', 'collection_id')
+        )
+
+        oversold = [
+            (product_id, quantities[product_id], inventory)
+            for product_id, unit_price, inventory, collection_id in products
+            if inventory < quantities[product_id]
+        ]
+        if oversold:
+            raise InsufficientInventory(oversold)
+
+        reserve_inventory(quantities)
+
+        order = Order.objects.create(customer_id=customer_id)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=product_id, unit_price=unit_price, quantity=quantities[product_id])
+            for product_id, unit_price, inventory, collection_id in products
+        ])
+
+        # Two DELETEs by id, nothing is loaded into Python
+        Cart.objects.delete_with_items([cart_id])
+
+        product_cache.invalidate('all', *(
+            scope
+            for product_id, unit_price, inventory, collection_id in products
+            for scope in (f'product:{product_id}', f'collection:{collection_id}')
+        ))
+        return order
+
+
+def reserve_inventory(quantities):
+    """Decrements Product.inventory by {product_id: quantity} in one UPDATE ... CASE."""
+    decrement = Case(
+        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+    return Product.objects.filter(id__in=quantities).update(inventory=F('inventory') - decrement)
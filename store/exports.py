@@ -0,0 +1,144 @@
+import csv
+import io
+from operator import itemgetter
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .models import Order, OrderItem, Product
+from .pagination import keyset_chunks
+from .renderers import dumps
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+EXPORTS = {
+    'product': (Product, ['id', 'title', 'slug', 'description', 'unit_price', 'price_with_tax',
+                          'inventory', 'collection_id', 'last_update']),
+    'order': (Order, ['id', 'customer_id', 'placed_at', 'payment_status']),
+    'orderitem': (OrderItem, ['id', 'order_id', 'product_id', 'quantity', 'unit_price']),
+}
+FORMATS = ['csv', 'jsonl', 'parquet']
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def pk_ranges(name, parts):
+    """Splits the table's id span into `parts` contiguous (first_id, last_id) ranges, one per worker."""
+    model, _ = EXPORTS[name]
+    ids = model.objects.order_by('id').values_list('id', flat=True)
+    first, last = ids.first(), ids.last()
+    if first is None:
+        return []
+    step = -(-(last - first + 1) // parts)
+    return [(start, min(start + step - 1, last)) for start in range(first, last + 1, step)]
+
+
+def export_chunks(name, queryset=None, first_id=None, last_id=None, chunk_size=2000):
+    """
+    Yields lists of up to chunk_size value tuples in id order, one keyset
+    query per chunk, so only one chunk is held in memory.
+    """
+    model, fields = EXPORTS[name]
+    queryset = queryset if queryset is not None else model.objects.all()
+    if first_id is not None:
+        queryset = queryset.filter(id__gte=first_id)
+    if last_id is not None:
+        queryset = queryset.filter(id__lte=last_id)
+    # every field list starts with the id
+    yield from keyset_chunks(queryset.values_list(*fields), chunk_size, key=itemgetter(0))
+
+
+def encode_csv(fields, chunks, header=True):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(fields)
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def encode_jsonl(fields, chunks):
+    for chunk in chunks:
+        yield b''.join(dumps(dict(zip(fields, row))) + b'\n' for row in chunk)
+
+
+def parquet_type(field):
+    if field.is_relation:
+        field = field.target_field
+    internal_type = field.get_internal_type()
+    if internal_type == 'DecimalField':
+        return pyarrow.decimal128(field.max_digits, field.decimal_places)
+    if internal_type == 'DateTimeField':
+        return pyarrow.timestamp('us', tz='UTC' if settings.USE_TZ else None)
+    if internal_type == 'DateField':
+        return pyarrow.date32()
+    if internal_type == 'BooleanField':
+        return pyarrow.bool_()
+    if internal_type.endswith(('AutoField', 'IntegerField')):
+        return pyarrow.int64()
+    return pyarrow.string()
+
+
+def parquet_schema(name):
+    """
+    The schema of an export, from the model fields. Inferring it per chunk
+    breaks when a nullable column is all NULL in one chunk.
+    """
+    model, fields = EXPORTS[name]
+    return pyarrow.schema([
+        pyarrow.field(name, parquet_type(field), nullable=field.null)
+        for name, field in ((name, model._meta.get_field(name)) for name in fields)
+    ])
+
+
+def write_parquet(name, chunks, path):
+    """One row group per chunk, so the writer never holds more than one chunk."""
+    if pyarrow is None:
+        raise RuntimeError('Parquet export requires pyarrow')
+    schema = parquet_schema(name)
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            columns = {field.name: [row[index] for row in chunk] for index, field in enumerate(schema)}
+            writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema))
+
+
+def export(name, output, format='csv', header=True, **kwargs):
+    """Writes the export to `output`, a binary file or, for parquet, a path. Returns the row count."""
+    _, fields = EXPORTS[name]
+    rows = 0
+
+    def counted(chunks):
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk
+
+    chunks = counted(export_chunks(name, **kwargs))
+    if format == 'parquet':
+        write_parquet(name, chunks, output)
+        return rows
+    encoded = encode_csv(fields, chunks, header) if format == 'csv' else encode_jsonl(fields, chunks)
+    for data in encoded:
+        output.write(data)
+    return rows
+
+
+def export_response(name, queryset, format='csv'):
+    """StreamingHttpResponse download of the queryset's rows, for admin actions."""
+    _, fields = EXPORTS[name]
+    chunks = export_chunks(name, queryset=queryset)
+    content = encode_csv(fields, chunks) if format == 'csv' else encode_jsonl(fields, chunks)
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[format])
+    response['Content-Disposition'] = f'attachment; filename="{name}s.{format}"'
+    return response
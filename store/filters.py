@@ -1,6 +1,8 @@
 from django_filters.rest_framework import FilterSet
+from rest_framework.filters import SearchFilter
 
-from .models import Product
+from .models import Product, SalesBucket
+from .search import get_search_engine
 
 
 class ProductFilterSet(FilterSet):
@@ -9,4 +11,25 @@ class ProductFilterSet(FilterSet):
         fields = {
             'collection_id':['exact'],
             'unit_price':['gt','lt']
-        }
\ No newline at end of file
+        }
+
+
+class SalesBucketFilterSet(FilterSet):
+    class Meta:
+        model = SalesBucket
+        fields = {
+            'dimension':['exact'],
+            'granularity':['exact'],
+            'object_id':['exact', 'in'],
+            'bucket_start':['gte','lt'],
+        }
+
+
+class ProductSearchFilter(SearchFilter):
+    """`?search=` backed by the full-text engine, ranked by relevance."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return get_search_engine().search(queryset, terms)
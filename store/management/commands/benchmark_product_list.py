@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from store.models import Product
+from store.serializers import ProductReadSerializer, ProductSerializer
+
+
+class Command(BaseCommand):
+    help = 'Checks that ProductReadSerializer renders the same JSON as ProductSerializer and times both'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='Products per page')
+        parser.add_argument('--rounds', type=int, default=20, help='Timed rounds per serializer')
+
+    def handle(self, *args, **options):
+        products = Product.objects.order_by('title', 'id')[:options['limit']]
+        renderer = JSONRenderer()
+
+        def model_path():
+            return renderer.render(ProductSerializer(products.prefetch_related('images'), many=True).data)
+
+        def rows_path():
+            return renderer.render(ProductReadSerializer(products.values(*ProductReadSerializer.row_fields)).data)
+
+        if model_path() != rows_path():
+            raise CommandError('ProductReadSerializer output differs from ProductSerializer')
+
+        model_time = self.measure(model_path, options['rounds'])
+        rows_time = self.measure(rows_path, options['rounds'])
+        count = products.count()
+        self.stdout.write(f'ProductSerializer:     {model_time * 1000:.2f} ms per page of {count}')
+        self.stdout.write(f'ProductReadSerializer: {rows_time * 1000:.2f} ms per page of {count}')
+        self.stdout.write(self.style.SUCCESS(f'Same output, {model_time / rows_time:.1f}x faster'))
+
+    @staticmethod
+    def measure(render, rounds):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            render()
+        return (time.perf_counter() - start) / rounds
@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.exports import EXPORTS, FORMATS, export, pk_ranges, pyarrow
+
+
+class Command(BaseCommand):
+    help = 'Streams products, orders or order items to CSV, JSONL or Parquet in id order'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='File to write, default stdout (not for parquet)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--parts', type=int, default=1,
+                            help='Split the id span into this many ranges, to export them in parallel')
+        parser.add_argument('--part', type=int, default=1, help='Which range to export, 1..parts')
+
+    def handle(self, *args, **options):
+        if options['format'] == 'parquet' and (pyarrow is None or not options['output']):
+            raise CommandError('Parquet export needs pyarrow installed and --output')
+        if not 1 <= options['part'] <= options['parts']:
+            raise CommandError('--part must be between 1 and --parts')
+
+        first_id = last_id = None
+        if options['parts'] > 1:
+            ranges = pk_ranges(options['model'], options['parts'])
+            if options['part'] > len(ranges):
+                self.stderr.write('Nothing to export in this part')
+                return
+            first_id, last_id = ranges[options['part'] - 1]
+
+        kwargs = {'format': options['format'], 'chunk_size': options['chunk_size'],
+                  'first_id': first_id, 'last_id': last_id,
+                  # Parts after the first can be appended to the first one
+                  **({'header': options['part'] == 1} if options['format'] == 'csv' else {})}
+        if options['format'] == 'parquet':
+            rows = export(options['model'], options['output'], **kwargs)
+        elif options['output']:
+            with open(options['output'], 'wb') as output:
+                rows = export(options['model'], output, **kwargs)
+        else:
+            rows = export(options['model'], sys.stdout.buffer, **kwargs)
+
+        self.stderr.write(f'Exported {rows} {options["model"]} rows')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from store.synthetic import SyntheticData
+
+
+class Command(BaseCommand):
+    help = 'Generates deterministic collections, products, images, customers, carts and orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--collections', type=int, default=10)
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--images-per-product', type=int, default=1)
+        parser.add_argument('--customers', type=int, default=100)
+        parser.add_argument('--carts', type=int, default=100)
+        parser.add_argument('--orders', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        data = SyntheticData(options['seed'], options['batch_size']).generate(
+            collections=options['collections'], products=options['products'],
+            images_per_product=options['images_per_product'], customers=options['customers'],
+            carts=options['carts'], orders=options['orders'])
+        self.stdout.write(self.style.SUCCESS(', '.join(f'{len(ids)} {name}' for name, ids in data.items())))
@@ -0,0 +1,99 @@
+import itertools
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from store.catalog import MODELS, Checkpoint, import_batch, read_rows, recount_products, reset_sequences
+from store.search import get_search_engine
+
+
+def init_worker():
+    # A no-op with fork; spawn/forkserver workers start without Django set up
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Upserts collections, products or promotions from a CSV or JSONL file, resuming where a failed run stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--model', choices=sorted(MODELS), default='product')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Default: from the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk upsert and transaction')
+        parser.add_argument('--workers', type=int, default=0, help='Import batches in this many processes (MySQL/PostgreSQL, SQLite allows one writer)')
+        parser.add_argument('--restart', action='store_true', help='Ignore the progress of a previous run')
+
+    def handle(self, *args, **options):
+        checkpoint = Checkpoint(f"{options['path']}.{options['model']}.progress")
+        if options['restart']:
+            checkpoint.clear()
+        skip = checkpoint.load()
+        if skip:
+            self.stdout.write(f'Resuming after row {skip}')
+
+        rows = itertools.islice(read_rows(options['path'], options['format']), skip, None)
+        batches = self.batches(rows, options['batch_size'], skip)
+        self.imported = 0
+        self.start = time.perf_counter()
+
+        try:
+            if options['workers']:
+                self.import_parallel(options['model'], batches, checkpoint, options['workers'])
+            else:
+                self.import_serial(options['model'], batches, checkpoint)
+        except Exception as error:
+            raise CommandError(
+                f'Import failed after {checkpoint.load()} rows ({error!r}), run the command again to resume') from error
+
+        reset_sequences(MODELS[options['model']])
+        # Includes the collections of batches imported by earlier, failed runs
+        touched = checkpoint.touched()
+        if touched:
+            recount_products(touched)
+        if options['model'] == 'product':
+            get_search_engine().reset()
+        checkpoint.clear()
+
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} {options["model"]} rows in {elapsed:.1f}s '
+            f'({self.imported / elapsed if elapsed else 0:.0f} rows/s)'))
+
+    @staticmethod
+    def batches(rows, batch_size, first_row):
+        start = first_row
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                return
+            yield start, batch
+            start += len(batch)
+
+    def import_serial(self, model, batches, checkpoint):
+        for start, rows in batches:
+            touched = import_batch(model, rows)
+            self.finished(checkpoint, start, len(rows), touched)
+
+    def import_parallel(self, model, batches, checkpoint, workers):
+        # Children must open their own connections, never share the parent's
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            pending = {}
+            for start, rows in itertools.chain(batches, [(None, None)]):
+                # At most two batches per worker in memory at a time
+                while pending and (start is None or len(pending) >= workers * 2):
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        batch_start, size = pending.pop(future)
+                        self.finished(checkpoint, batch_start, size, future.result())
+                if start is not None:
+                    pending[pool.submit(import_batch, model, rows)] = (start, len(rows))
+
+    def finished(self, checkpoint, start, size, touched):
+        checkpoint.save(start, start + size, touched)
+        self.imported += size
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(f'{self.imported} rows, {self.imported / elapsed if elapsed else 0:.0f} rows/s')
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from store.reaper import reap_expired_carts
+
+
+class Command(BaseCommand):
+    help = 'Deletes carts (and their items) older than CART_TTL_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl-days', type=int, default=settings.CART_TTL_DAYS)
+        parser.add_argument('--batch-size', type=int, default=settings.CART_REAPER_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        stats = reap_expired_carts(options['ttl_days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {stats['carts']} carts and {stats['items']} items "
+            f"in {stats['batches']} batches ({stats['seconds']}s)"))
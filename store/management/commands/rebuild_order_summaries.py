@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store.rollups import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recomputes CustomerOrderSummary rows from the order tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('customer_ids', nargs='*', type=int, help='Only these customers (default: all)')
+
+    def handle(self, *args, **options):
+        written = rebuild_summaries(options['customer_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} customer order summaries'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from store.models import Collection, Product
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Collection.products_count for collections whose stored count has drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the drifted collections')
+
+    def handle(self, *args, **options):
+        counts = (Product.objects.filter(collection=OuterRef('pk'))
+                  .order_by().values('collection').annotate(count=Count('id')).values('count'))
+        actual = Coalesce(Subquery(counts), Value(0))
+
+        with transaction.atomic():
+            drifted = (Collection.objects
+                       .annotate(actual_count=actual)
+                       .exclude(products_count=F('actual_count')))
+            rows = list(drifted.values_list('id', 'title', 'products_count', 'actual_count'))
+
+            for collection_id, title, stored, counted in rows:
+                self.stdout.write(f'{title} (#{collection_id}): stored {stored}, actual {counted}')
+
+            if rows and not options['dry_run']:
+                Collection.objects.filter(id__in=[row[0] for row in rows]).update(products_count=actual)
+
+        verb = 'Found' if options['dry_run'] else 'Reconciled'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(rows)} drifted collections'))
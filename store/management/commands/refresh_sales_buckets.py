@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from store.reporting import rebuild_sales_buckets, refresh_sales_buckets
+
+
+class Command(BaseCommand):
+    help = 'Folds new orders into the sales report buckets, or rebuilds them from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.REPORTING_BATCH_SIZE)
+        parser.add_argument('--settle-seconds', type=int, default=settings.REPORTING_SETTLE_SECONDS)
+        parser.add_argument('--rebuild', action='store_true', help='Drop all buckets and fold every order again')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            stats = rebuild_sales_buckets(options['batch_size'], options['settle_seconds'])
+        else:
+            stats = {'orders': 0, 'buckets': 0, 'batches': 0, 'has_more': True}
+            while stats['has_more']:
+                batch = refresh_sales_buckets(options['batch_size'], options['settle_seconds'])
+                for name in ('orders', 'buckets', 'batches'):
+                    stats[name] += batch[name]
+                stats['has_more'] = batch['has_more']
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Folded {stats['orders']} orders into {stats['buckets']} buckets in {stats['batches']} batches"))
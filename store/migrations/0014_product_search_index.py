@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX store_product_search_idx ON store_product (title, description)')
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX store_product_search_idx ON store_product USING GIN "
+            "(to_tsvector('english', COALESCE(title, '') || ' ' || COALESCE(description, '')))")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute('DROP INDEX store_product_search_idx ON store_product')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX store_product_search_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:57
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Round
+
+
+def populate_price_with_tax(apps, schema_editor):
+    Collection = apps.get_model('store', 'Collection')
+    Product = apps.get_model('store', 'Product')
+    tax_rate = Subquery(Collection.objects.filter(pk=OuterRef('collection_id')).values('tax_rate')[:1])
+    Product.objects.update(price_with_tax=Round(F('unit_price') * (1 + tax_rate), 2))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0017_cart_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='tax_rate',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.10'), max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='price_with_tax',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=8),
+        ),
+        migrations.RunPython(populate_price_with_tax, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:02
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_order_summaries(apps, schema_editor):
+    Customer = apps.get_model('store', 'Customer')
+    CustomerOrderSummary = apps.get_model('store', 'CustomerOrderSummary')
+    Order = apps.get_model('store', 'Order')
+    OrderItem = apps.get_model('store', 'OrderItem')
+    money = DecimalField(max_digits=12, decimal_places=2)
+
+    orders = Order.objects.filter(customer=OuterRef('pk')).order_by().values('customer')
+    spend = (OrderItem.objects.filter(order__customer=OuterRef('pk'), order__payment_status='C')
+             .order_by().values('order__customer')
+             .annotate(total=Sum(ExpressionWrapper(F('quantity') * F('unit_price'), output_field=money)))
+             .values('total'))
+    rows = Customer.objects.filter(order__isnull=False).distinct().annotate(
+        orders_count=Subquery(orders.annotate(count=Count('id')).values('count')),
+        last_order_at=Subquery(orders.annotate(last=Max('placed_at')).values('last')),
+        lifetime_spend=Coalesce(Subquery(spend), Value(Decimal('0.00')), output_field=money),
+    ).values_list('id', 'orders_count', 'last_order_at', 'lifetime_spend')
+    CustomerOrderSummary.objects.bulk_create([
+        CustomerOrderSummary(customer_id=customer_id, orders_count=count, last_order_at=last, lifetime_spend=total)
+        for customer_id, count, last, total in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_tax_rate_price_with_tax'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerOrderSummary',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='order_summary', serialize=False, to='store.customer')),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('lifetime_spend', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_order_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(populate_order_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0020_salesbucket_reportwatermark'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='orderevent',
+            name='store_order_dispatc_589689_idx',
+        ),
+        migrations.AddField(
+            model_name='orderevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='orderevent',
+            index=models.Index(fields=['dispatched_at', 'next_attempt_at'], name='store_order_dispatc_fffe81_idx'),
+        ),
+    ]
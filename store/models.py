@@ -1,7 +1,10 @@
 from django.conf import settings
 from django.contrib.admin import display
-from django.db import models 
-from django.core.validators import MinValueValidator
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
+from decimal import Decimal
 from uuid import uuid4
 
 from store.validators import validate_file_size
@@ -16,8 +19,24 @@ class Collection(models.Model):
     title = models.CharField(max_length=255)
     featured_product = models.ForeignKey(
         'Product', on_delete=models.SET_NULL, null=True, related_name='+')
+    # Maintained by the Product signal handlers, see reconcile_products_count
+    products_count = models.IntegerField(default=0, editable=False)
+    # Changing it recomputes Product.price_with_tax for the collection
+    tax_rate = models.DecimalField(
+        max_digits=5, decimal_places=4, default=Decimal('0.10'),
+        validators=[MinValueValidator(0), MaxValueValidator(1)])
+
     def __str__(self):
         return self.title
+
+    # products_count only changes through F() updates. A full save would
+    # write back the count loaded with the instance over concurrent ones.
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name != 'products_count']
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['title']
 
@@ -28,15 +47,32 @@ class Product(models.Model):
     description = models.TextField(null=True,blank=True)
     unit_price = models.DecimalField(max_digits=6, decimal_places=2,validators=[MinValueValidator(1)])
     inventory = models.IntegerField(validators=[MinValueValidator(1)])
+    # unit_price * (1 + collection.tax_rate), set by the signal handlers
+    price_with_tax = models.DecimalField(max_digits=8, decimal_places=2, default=0, editable=False)
     last_update = models.DateTimeField(auto_now=True)
     collection = models.ForeignKey(Collection, on_delete=models.PROTECT,related_name='products')
     promotions = models.ManyToManyField(Promotion)
 
     def __str__(self):
         return self.title
+
+    # The signal handlers keep Collection.products_count in sync, so they
+    # have to run in the same transaction as the row change.
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
     
     class Meta:
         ordering = ['title']
+        indexes = [
+            models.Index(fields=['title', 'id']),
+            models.Index(fields=['unit_price', 'id']),
+            models.Index(fields=['last_update', 'id']),
+        ]
 
 
 class ProductImage(models.Model):
@@ -92,12 +128,29 @@ class Order(models.Model):
     payment_status = models.CharField(
         max_length=1, choices=PAYMENT_STATUS_CHOICES, default=PAYMENT_STATUS_PENDING)
     customer = models.ForeignKey(Customer, on_delete=models.PROTECT)
+
+    # The signal handlers keep CustomerOrderSummary in sync, so they have to
+    # run in the same transaction as the row change.
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         permissions = [
             ('cancel_order','Can cancel order')
         ]
 
 
+class CustomerOrderSummary(models.Model):
+    """Per-customer order rollup maintained by store.rollups, see rebuild_order_summaries."""
+    customer = models.OneToOneField(
+        Customer, on_delete=models.CASCADE, primary_key=True, related_name='order_summary')
+    orders_count = models.PositiveIntegerField(default=0)
+    # Sum of quantity * unit_price over the customer's completed orders
+    lifetime_spend = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_order_at = models.DateTimeField(null=True, blank=True)
+
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.PROTECT,related_name='items')
     product = models.ForeignKey(Product, on_delete=models.PROTECT,related_name='orderitems')
@@ -112,12 +165,130 @@ class Address(models.Model):
         Customer, on_delete=models.CASCADE)
 
 
+class CartManager(models.Manager):
+    def with_total_price(self):
+        """Values rows of (id, total_price) with the total computed by the database."""
+        return self.annotate(
+            total_price=models.Sum(models.ExpressionWrapper(
+                F('items__quantity') * F('items__product__unit_price'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)))
+        ).values('id', 'total_price')
+
+    def delete_with_items(self, cart_ids):
+        """
+        Deletes the carts and their items with two statements and without
+        loading rows into Python, returns (carts, items) deleted. Items go
+        first with one DELETE ... WHERE cart_id IN (...), then the carts
+        with one DELETE ... WHERE id IN (...), which skips the collector,
+        so Cart delete signals don't run.
+        """
+        items, _ = CartItem.objects.filter(cart_id__in=cart_ids).delete()
+        carts = self.filter(id__in=cart_ids)._raw_delete(self.db)
+        return carts, items
+
+
 class Cart(models.Model):
+    objects = CartManager()
     id = models.UUIDField(primary_key=True, default=uuid4)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+
+class CartItemManager(models.Manager):
+    def rows_for(self, cart_id):
+        """Values rows of the cart's items, product fields included, with line totals computed by the database."""
+        return self.filter(cart_id=cart_id).order_by('id').annotate(
+            total_price=models.ExpressionWrapper(
+                F('quantity') * F('product__unit_price'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2))
+        ).values('id', 'quantity', 'total_price', 'product_id', 'product__title', 'product__unit_price')
+
+    def add_products(self, cart_id, quantities):
+        """
+        Adds {product_id: quantity} to the cart, incrementing the quantity of
+        items that are already in it. Products that don't exist are skipped,
+        so callers can compare the returned items with what they asked for.
+
+        Uses a single INSERT ... SELECT ... ON CONFLICT / ON DUPLICATE KEY
+        UPDATE statement where the backend supports it and F() updates
+        otherwise.
+        """
+        if not quantities:
+            return []
+
+        features = connection.features
+        if not features.supports_update_conflicts:
+            return self._add_with_f(cart_id, quantities)
+
+        # MySQL and SQLite < 3.35 can't return the rows, they are read back
+        returning = features.supports_update_conflicts_with_target and features.can_return_rows_from_bulk_insert
+        items = self._upsert(cart_id, quantities, returning)
+        if returning:
+            return items
+        return list(self.filter(cart_id=cart_id, product_id__in=quantities))
+
+    def _upsert(self, cart_id, quantities, returning):
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        product_table = qn(Product._meta.db_table)
+        cart_field = self.model._meta.get_field('cart')
+        cart_id = cart_field.to_python(cart_id)
+
+        whens = ' '.join(['WHEN %s THEN %s'] * len(quantities))
+        placeholders = ', '.join(['%s'] * len(quantities))
+        sql = (
+            f'INSERT INTO {table} ({qn("cart_id")}, {qn("product_id")}, {qn("quantity")}) '
+            f'SELECT %s, p.{qn("id")}, CASE p.{qn("id")} {whens} END '
+            f'FROM {product_table} p WHERE p.{qn("id")} IN ({placeholders}) '
+        )
+        if connection.features.supports_update_conflicts_with_target:
+            sql += (
+                f'ON CONFLICT ({qn("cart_id")}, {qn("product_id")}) DO UPDATE '
+                f'SET {qn("quantity")} = {table}.{qn("quantity")} + EXCLUDED.{qn("quantity")} '
+            )
+            if returning:
+                sql += f'RETURNING {qn("id")}, {qn("product_id")}, {qn("quantity")}'
+        else:
+            sql += (
+                f'ON DUPLICATE KEY UPDATE '
+                f'{qn("quantity")} = {table}.{qn("quantity")} + VALUES({qn("quantity")})'
+            )
+        params = [cart_field.get_db_prep_value(cart_id, connection)]
+        for product_id, quantity in quantities.items():
+            params += [product_id, quantity]
+        params += list(quantities)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            if not returning:
+                return None
+            return [
+                self.model(id=item_id, cart_id=cart_id, product_id=product_id, quantity=quantity)
+                for item_id, product_id, quantity in cursor.fetchall()
+            ]
+
+    def _add_with_f(self, cart_id, quantities):
+        existing = set(Product.objects.filter(id__in=quantities).values_list('id', flat=True))
+        for product_id in existing:
+            quantity = quantities[product_id]
+            items = self.filter(cart_id=cart_id, product_id=product_id)
+            if items.update(quantity=F('quantity') + quantity):
+                continue
+            try:
+                with transaction.atomic():
+                    self.create(cart_id=cart_id, product_id=product_id, quantity=quantity)
+            except IntegrityError:
+                # Lost the race to a concurrent add of the same product
+                items.update(quantity=F('quantity') + quantity)
+        return list(self.filter(cart_id=cart_id, product_id__in=existing))
+
 
 class CartItem(models.Model):
+    objects = CartItemManager()
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveSmallIntegerField(validators=[MinValueValidator(1)])
@@ -130,4 +301,67 @@ class Review(models.Model):
     description = models.TextField()
     name = models.CharField(max_length=255)
     date = models.DateField(auto_now=True)
-    
\ No newline at end of file
+    
+
+class OrderEvent(models.Model):
+    """Outbox row written in the order's transaction and delivered by store.tasks.dispatch_order_events."""
+    EVENT_ORDER_CREATED = 'order_created'
+    EVENT_CHOICES = [
+        (EVENT_ORDER_CREATED, 'Order created'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='events')
+    event = models.CharField(max_length=50, choices=EVENT_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Claimed events and failed ones waiting for their retry have it in the future
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dispatched_at', 'next_attempt_at']),
+        ]
+
+
+class SalesBucket(models.Model):
+    """Revenue, units and orders of paid orders per product or collection per hour/day, maintained by store.reporting."""
+    GRANULARITY_HOUR = 'hour'
+    GRANULARITY_DAY = 'day'
+    GRANULARITY_CHOICES = [
+        (GRANULARITY_HOUR, 'Hour'),
+        (GRANULARITY_DAY, 'Day'),
+    ]
+    DIMENSION_PRODUCT = 'product'
+    DIMENSION_COLLECTION = 'collection'
+    DIMENSION_CHOICES = [
+        (DIMENSION_PRODUCT, 'Product'),
+        (DIMENSION_COLLECTION, 'Collection'),
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    # Product or Collection id, depending on dimension
+    object_id = models.PositiveBigIntegerField()
+    bucket_start = models.DateTimeField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    orders_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index for range queries on one product / collection
+            models.UniqueConstraint(
+                fields=['dimension', 'granularity', 'object_id', 'bucket_start'], name='unique_sales_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['dimension', 'granularity', 'bucket_start']),
+        ]
+
+
+class ReportWatermark(models.Model):
+    """Highest Order.id already folded into a report."""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_order_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,99 @@
+import logging
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OrderEvent
+from .signals import order_created
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 10
+# A claimed event is offered again after this long, in case its worker died
+CLAIM_SECONDS = 5 * 60
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 60 * 60
+
+SIGNALS = {
+    OrderEvent.EVENT_ORDER_CREATED: order_created,
+}
+
+
+def record_order_event(order, event=OrderEvent.EVENT_ORDER_CREATED):
+    """
+    Stores the event in the current transaction and hands it to Celery once
+    the transaction commits, so receivers never run on the request thread and
+    never see an order that was rolled back. If the broker is unreachable the
+    error is only logged: the order is already committed, and the periodic
+    dispatch_order_events run picks the event up.
+    """
+    from .tasks import dispatch_order_events
+
+    OrderEvent.objects.create(order=order, event=event)
+    transaction.on_commit(dispatch_order_events.delay, robust=True)
+
+
+def retry_delay(attempts):
+    """Exponential backoff after the given number of failed attempts."""
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def claim_pending(batch_size):
+    """
+    Claims up to batch_size due events in a short transaction: their attempt
+    is counted and next_attempt_at moved CLAIM_SECONDS ahead, so other
+    workers skip them while they are delivered, and a worker that dies
+    mid-delivery only delays them. Returns (events, has_more).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = (OrderEvent.objects
+                  .select_related('order')
+                  .filter(dispatched_at__isnull=True, attempts__lt=MAX_ATTEMPTS, next_attempt_at__lte=now)
+                  .order_by('next_attempt_at', 'id'))
+        features = connection.features
+        if features.has_select_for_update_skip_locked and features.has_select_for_update_of:
+            events = events.select_for_update(skip_locked=True, of=('self',))
+        events = list(events[:batch_size + 1])
+        has_more = len(events) > batch_size
+        events = events[:batch_size]
+
+        OrderEvent.objects.filter(id__in=[event.id for event in events]).update(
+            attempts=F('attempts') + 1, next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS))
+    for event in events:
+        event.attempts += 1
+    return events, has_more
+
+
+def dispatch_pending(batch_size=100):
+    """
+    Sends up to batch_size due events to their signal receivers.
+
+    Receivers run outside of any transaction, after the events were claimed.
+    Delivery is at-least-once: an event is only marked as dispatched after
+    every receiver returned without raising, so receivers must be idempotent.
+    A failed event is retried after retry_delay(attempts).
+    Returns (dispatched, failed, has_more).
+    """
+    dispatched = failed = 0
+    events, has_more = claim_pending(batch_size)
+
+    for event in events:
+        responses = SIGNALS[event.event].send_robust(OrderEvent, order=event.order)
+        errors = [repr(response) for receiver, response in responses if isinstance(response, Exception)]
+
+        if errors:
+            failed += 1
+            event.last_error = '\n'.join(errors)
+            event.next_attempt_at = timezone.now() + retry_delay(event.attempts)
+            logger.warning('Delivering %s for order %s failed (attempt %s): %s',
+                           event.event, event.order_id, event.attempts, event.last_error)
+        else:
+            dispatched += 1
+            event.dispatched_at = timezone.now()
+            event.last_error = ''
+        event.save(update_fields=['dispatched_at', 'next_attempt_at', 'last_error'])
+
+    return dispatched, failed, has_more
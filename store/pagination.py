@@ -1,8 +1,190 @@
+import base64
+import binascii
+import json
+
+from operator import attrgetter
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination,LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
 
+def keyset_chunks(queryset, chunk_size, key=attrgetter('pk')):
+    """
+    Yields the queryset in primary key order as lists of at most chunk_size
+    rows, one `WHERE pk > last LIMIT n` query per chunk. Only one chunk is
+    in memory on every backend, unlike .iterator(): MySQL can't stream, so
+    mysqlclient buffers the whole result set. `key` gets the pk of a row,
+    e.g. itemgetter(0) for values_list rows starting with the id.
+    """
+    queryset = queryset.order_by('pk')
+    last = None
+    while True:
+        chunk = list((queryset if last is None else queryset.filter(pk__gt=last))[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last = key(chunk[-1])
 
 
 class DefaultPagination(LimitOffsetPagination):
     page_size=10
     default_limit = 10
-    
\ No newline at end of file
+
+
+class KeysetPagination(DefaultPagination):
+    """
+    Cursor pagination over a composite sort key, e.g. (title, id).
+
+    Every page is a `WHERE (key) > (last key) LIMIT n` seek instead of an
+    `OFFSET n` scan, so deep pages cost the same as the first one. The total
+    count can be skipped with `?count=false`. Requests that still pass
+    `?offset=` are served by the plain limit/offset pagination.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    max_limit = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    # ordering → seek fields, the primary key always breaks ties
+    orderings = {
+        'title': ['title', 'id'],
+        'unit_price': ['unit_price', 'id'],
+        '-unit_price': ['-unit_price', '-id'],
+        'last_update': ['last_update', 'id'],
+        '-last_update': ['-last_update', '-id'],
+        '-search_rank': ['-search_rank', '-id'],
+    }
+    default_ordering = 'title'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.offset_query_param not in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.fields = self.get_seek_fields(queryset)
+        position, reverse = self.decode_cursor(request)
+
+        self.count = self.get_count(queryset) if self.include_count(request) else None
+
+        queryset = queryset.order_by(*(self.flip(field) if reverse else field for field in self.fields))
+        if position is not None:
+            queryset = queryset.filter(self.seek(position, reverse))
+
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        }
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['required'] = ['results']
+        return schema
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_seek_fields(self, queryset):
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        key = ordering[0] if ordering else self.default_ordering
+        return self.orderings.get(key, self.orderings[self.default_ordering])
+
+    def include_count(self, request):
+        value = request.query_params.get(self.count_query_param, 'true')
+        return value.lower() not in ('0', 'false', 'no')
+
+    def seek(self, position, reverse):
+        # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y)
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.fields, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            position = cursor['p']
+            reverse = bool(cursor['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse):
+        position = [self.serialize_value(self.get_value(instance, field.lstrip('-'))) for field in self.fields]
+        cursor = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        url = remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def get_value(instance, name):
+        # Pages are model instances or .values() rows
+        if isinstance(instance, dict):
+            return instance[name]
+        return getattr(instance, name)
+
+    @staticmethod
+    def serialize_value(value):
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if isinstance(value, (int, float, str)):
+            return value
+        return str(value)
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
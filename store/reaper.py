@@ -0,0 +1,38 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Cart
+
+logger = logging.getLogger(__name__)
+
+
+def reap_expired_carts(ttl_days, batch_size=1000):
+    """
+    Deletes carts created more than ttl_days ago, batch_size carts per
+    transaction, see CartManager.delete_with_items.
+    """
+    cutoff = timezone.now() - timedelta(days=ttl_days)
+    expired = Cart.objects.filter(created_at__lt=cutoff).order_by('created_at', 'id')
+    stats = {'carts': 0, 'items': 0, 'batches': 0}
+    start = time.perf_counter()
+
+    while True:
+        with transaction.atomic():
+            ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            carts, items = Cart.objects.delete_with_items(ids)
+
+        stats['carts'] += carts
+        stats['items'] += items
+        stats['batches'] += 1
+        if len(ids) < batch_size:
+            break
+
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    logger.info('Reaped %(carts)s carts and %(items)s items in %(batches)s batches (%(seconds)ss)', stats)
+    return stats
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .pagination import keyset_chunks
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# JSONRenderer escapes these for JSONP/inline <script> safety, so do we
+LINE_SEPARATORS = [(b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029')]
+
+_encoder = JSONEncoder()
+
+
+def dumps(data):
+    """
+    Compact UTF-8 JSON, with the same output as DRF's JSONRenderer. Uses
+    orjson when it is installed, values orjson doesn't know (Decimal, lazy
+    strings, ...) and datetimes go through DRF's encoder.
+    """
+    if orjson is None:
+        return JSONRenderer().render(data)
+
+    body = orjson.dumps(
+        data, default=_encoder.default,
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+    for separator, escaped in LINE_SEPARATORS:
+        if separator in body:
+            body = body.replace(separator, escaped)
+    return body
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson, indented responses still use the stdlib encoder."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class StreamingListMixin:
+    """
+    `?stream=true` on the list action returns every matching row as one JSON
+    array, unpaginated and in primary key order. Rows are read in keyset
+    chunks (see keyset_chunks) and each chunk is serialized and sent before
+    the next is fetched, so memory use does not grow with the size of the
+    result, on MySQL too.
+    """
+    stream_query_param = 'stream'
+
+    @property
+    def stream_chunk_size(self):
+        return getattr(settings, 'STORE_STREAM_CHUNK_SIZE', 500)
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.stream_query_param, '').lower() not in ('1', 'true', 'yes'):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(self.stream_json(queryset), content_type='application/json')
+
+    def stream_json(self, queryset):
+        chunk_size = self.stream_chunk_size
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+
+        def encode(rows):
+            # "[a,b]" → "a,b"
+            return dumps(serializer_class(rows, many=True, context=context).data)[1:-1]
+
+        yield b'['
+        separator = b''
+        for rows in keyset_chunks(queryset, chunk_size):
+            yield separator + encode(rows)
+            separator = b','
+        yield b']'
@@ -0,0 +1,149 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import Order, OrderItem, ReportWatermark, SalesBucket
+
+logger = logging.getLogger(__name__)
+
+WATERMARK = 'sales_buckets'
+
+TRUNCATE = {
+    SalesBucket.GRANULARITY_HOUR: TruncHour,
+    SalesBucket.GRANULARITY_DAY: TruncDay,
+}
+DIMENSION_FIELDS = {
+    SalesBucket.DIMENSION_PRODUCT: 'product_id',
+    SalesBucket.DIMENSION_COLLECTION: 'product__collection_id',
+}
+
+
+def aggregate_orders(first_id, last_id, paid_only=True):
+    """
+    Sums the items of the paid orders first_id..last_id into
+    {(dimension, granularity, object_id, bucket_start): [revenue, units, orders]},
+    one GROUP BY per dimension and granularity.
+    """
+    items = OrderItem.objects.filter(order_id__gte=first_id, order_id__lte=last_id).order_by()
+    if paid_only:
+        items = items.filter(order__payment_status=Order.PAYMENT_STATUS_COMPLETE)
+    line_total = ExpressionWrapper(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+    totals = {}
+    for granularity, truncate in TRUNCATE.items():
+        for dimension, field in DIMENSION_FIELDS.items():
+            rows = (items.annotate(bucket=truncate('order__placed_at'))
+                    .values('bucket', field)
+                    .annotate(revenue=Sum(line_total), units=Sum('quantity'), orders=Count('order_id', distinct=True)))
+            for row in rows:
+                key = (dimension, granularity, row[field], row['bucket'])
+                totals[key] = [row['revenue'], row['units'], row['orders']]
+    return totals
+
+
+def merge_buckets(totals):
+    """Adds the totals to the stored buckets, creating the missing ones."""
+    existing = defaultdict(set)
+    for dimension, granularity, object_id, bucket_start in totals:
+        existing[(dimension, granularity)].add(object_id)
+
+    stored = {}
+    for (dimension, granularity), object_ids in existing.items():
+        starts = {key[3] for key in totals if key[:2] == (dimension, granularity)}
+        buckets = SalesBucket.objects.select_for_update().filter(
+            dimension=dimension, granularity=granularity,
+            object_id__in=object_ids, bucket_start__gte=min(starts), bucket_start__lte=max(starts))
+        for bucket in buckets:
+            stored[(bucket.dimension, bucket.granularity, bucket.object_id, bucket.bucket_start)] = bucket
+
+    updated, created = [], []
+    for key, (revenue, units, orders) in totals.items():
+        bucket = stored.get(key)
+        if bucket is None:
+            dimension, granularity, object_id, bucket_start = key
+            created.append(SalesBucket(
+                dimension=dimension, granularity=granularity, object_id=object_id, bucket_start=bucket_start,
+                revenue=revenue, units=units, orders_count=orders))
+        else:
+            bucket.revenue += revenue
+            bucket.units += units
+            bucket.orders_count += orders
+            updated.append(bucket)
+
+    SalesBucket.objects.bulk_update(updated, ['revenue', 'units', 'orders_count'], batch_size=500)
+    SalesBucket.objects.bulk_create(created, batch_size=500)
+    return len(updated) + len(created)
+
+
+def record_payment_status_change(order, previous_status):
+    """
+    Adds or removes an already folded order when it becomes paid or stops
+    being paid. Orders above the watermark are left to the next refresh,
+    which reads their status then. Holding the watermark lock keeps a
+    running refresh from folding the order at the same time.
+    """
+    complete = Order.PAYMENT_STATUS_COMPLETE
+    if (previous_status == complete) == (order.payment_status == complete):
+        return
+    with transaction.atomic():
+        watermark = ReportWatermark.objects.select_for_update().filter(name=WATERMARK).first()
+        if watermark is None or order.id > watermark.last_order_id:
+            return
+        totals = aggregate_orders(order.id, order.id, paid_only=False)
+        if order.payment_status != complete:
+            totals = {key: [-value for value in values] for key, values in totals.items()}
+        merge_buckets(totals)
+
+
+def refresh_sales_buckets(batch_size=1000, settle_seconds=60):
+    """
+    Folds orders above the watermark into the sales buckets, batch_size
+    orders per transaction, and returns
+    {'orders': ..., 'buckets': ..., 'batches': ..., 'has_more': ...}.
+
+    Only orders placed more than settle_seconds ago are read: an order id is
+    taken at INSERT but becomes visible at COMMIT, and waiting lets lower ids
+    still in flight commit before the watermark moves past them.
+    """
+    settled = Order.objects.filter(placed_at__lte=timezone.now() - timedelta(seconds=settle_seconds))
+    last_settled_id = settled.aggregate(last=Max('id'))['last'] or 0
+    stats = {'orders': 0, 'buckets': 0, 'batches': 0, 'has_more': False}
+
+    with transaction.atomic():
+        watermark, _ = ReportWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+        if watermark.last_order_id >= last_settled_id:
+            return stats
+
+        ids = list(Order.objects.filter(id__gt=watermark.last_order_id, id__lte=last_settled_id)
+                   .order_by('id').values_list('id', flat=True)[:batch_size])
+        totals = aggregate_orders(ids[0], ids[-1])
+        stats['buckets'] = merge_buckets(totals)
+        stats['orders'] = len(ids)
+        stats['batches'] = 1
+        stats['has_more'] = ids[-1] < last_settled_id
+
+        watermark.last_order_id = ids[-1]
+        watermark.save()
+
+    logger.info('Folded %(orders)s orders into %(buckets)s sales buckets', stats)
+    return stats
+
+
+def rebuild_sales_buckets(batch_size=1000, settle_seconds=60):
+    """Drops every bucket and folds all orders again."""
+    with transaction.atomic():
+        SalesBucket.objects.all().delete()
+        ReportWatermark.objects.filter(name=WATERMARK).delete()
+
+    totals = {'orders': 0, 'buckets': 0, 'batches': 0}
+    while True:
+        stats = refresh_sales_buckets(batch_size, settle_seconds)
+        for name in totals:
+            totals[name] += stats[name]
+        if not stats['has_more']:
+            return totals
@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Customer, CustomerOrderSummary, Order, OrderItem
+
+ZERO = Decimal('0.00')
+
+
+def order_total(order_id):
+    total = OrderItem.objects.filter(order_id=order_id).aggregate(
+        total=Sum(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=12, decimal_places=2)))['total']
+    return total or ZERO
+
+
+def _apply(customer_id, **changes):
+    # UPDATE the summary row, creating it the first time the customer is seen
+    summaries = CustomerOrderSummary.objects.filter(customer_id=customer_id)
+    if summaries.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            CustomerOrderSummary.objects.create(customer_id=customer_id)
+    except IntegrityError:
+        pass  # created by a concurrent order of the same customer
+    summaries.update(**changes)
+
+
+def record_order_placed(order):
+    _apply(order.customer_id, orders_count=F('orders_count') + 1, last_order_at=order.placed_at)
+    if order.payment_status == Order.PAYMENT_STATUS_COMPLETE:
+        # the items are saved after the order, count them once they are all in
+        refresh_spend_on_commit(order.customer_id)
+
+
+def refresh_spend(customer_id):
+    """Recomputes the customer's lifetime_spend from their completed orders."""
+    total = OrderItem.objects.filter(
+        order__customer_id=customer_id, order__payment_status=Order.PAYMENT_STATUS_COMPLETE,
+    ).aggregate(total=Sum(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=12, decimal_places=2)))
+    _apply(customer_id, lifetime_spend=total['total'] or ZERO)
+
+
+def refresh_spend_on_commit(customer_id):
+    transaction.on_commit(lambda: refresh_spend(customer_id))
+
+
+def record_order_deleted(order):
+    rebuild_summaries([order.customer_id])
+
+
+def record_payment_status_change(order, previous_status):
+    complete = Order.PAYMENT_STATUS_COMPLETE
+    if (previous_status == complete) == (order.payment_status == complete):
+        return
+    total = order_total(order.id)
+    delta = total if order.payment_status == complete else -total
+    _apply(order.customer_id, lifetime_spend=F('lifetime_spend') + delta)
+
+
+def rebuild_summaries(customer_ids=None):
+    """Recomputes the summaries from the order tables, returns how many were written."""
+    orders = Order.objects.filter(customer=OuterRef('pk')).order_by().values('customer')
+    spend = (OrderItem.objects
+             .filter(order__customer=OuterRef('pk'), order__payment_status=Order.PAYMENT_STATUS_COMPLETE)
+             .order_by().values('order__customer')
+             .annotate(total=Sum(ExpressionWrapper(
+                 F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=12, decimal_places=2))))
+             .values('total'))
+
+    customers = Customer.objects.filter(order__isnull=False).distinct()
+    if customer_ids is not None:
+        customers = customers.filter(id__in=customer_ids)
+    rows = customers.annotate(
+        orders_count=Subquery(orders.annotate(count=Count('id')).values('count')),
+        last_order_at=Subquery(orders.annotate(last=Max('placed_at')).values('last')),
+        lifetime_spend=Coalesce(Subquery(spend), Value(ZERO), output_field=DecimalField(max_digits=12, decimal_places=2)),
+    ).values_list('id', 'orders_count', 'last_order_at', 'lifetime_spend')
+
+    summaries = [
+        CustomerOrderSummary(customer_id=customer_id, orders_count=count, last_order_at=last, lifetime_spend=total)
+        for customer_id, count, last, total in rows
+    ]
+    with transaction.atomic():
+        stale = CustomerOrderSummary.objects.all()
+        if customer_ids is not None:
+            stale = stale.filter(customer_id__in=customer_ids)
+        stale.delete()
+        CustomerOrderSummary.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
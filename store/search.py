@@ -0,0 +1,184 @@
+import math
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Product
+
+
+class SearchEngine:
+    """
+    Full-text search over Product.title and Product.description.
+
+    `search` narrows a Product queryset to the matching rows, annotates it
+    with `search_rank` and orders it by relevance (highest first).
+    """
+    rank_field = 'search_rank'
+
+    def search(self, queryset, terms):
+        raise NotImplementedError
+
+    def index(self, product):
+        """Called after a product is saved. Database backed engines keep their own index."""
+
+    def remove(self, product_id):
+        """Called after a product is deleted."""
+
+    def reset(self):
+        """Drop any in-process state."""
+
+    def order(self, queryset):
+        return queryset.order_by(f'-{self.rank_field}', '-id')
+
+
+class RawSQLSearchEngine(SearchEngine):
+    match_sql = None
+    rank_sql = None
+
+    def search(self, queryset, terms):
+        query = ' '.join(terms)
+        columns = self.columns()
+        queryset = queryset.annotate(**{
+            self.rank_field: RawSQL(self.rank_sql.format(**columns), [query], output_field=FloatField())
+        }).filter(RawSQL(self.match_sql.format(**columns), [query], output_field=BooleanField()))
+        return self.order(queryset)
+
+    def columns(self):
+        table = connection.ops.quote_name(Product._meta.db_table)
+        return {
+            'title': f"{table}.{connection.ops.quote_name('title')}",
+            'description': f"{table}.{connection.ops.quote_name('description')}",
+        }
+
+
+class MySQLSearchEngine(RawSQLSearchEngine):
+    """Uses the FULLTEXT(title, description) index created in migration 0014."""
+    match_sql = 'MATCH ({title}, {description}) AGAINST (%s IN NATURAL LANGUAGE MODE)'
+    rank_sql = match_sql
+
+
+class PostgreSQLSearchEngine(RawSQLSearchEngine):
+    """Uses the GIN tsvector expression index created in migration 0014."""
+    vector_sql = "to_tsvector('english', COALESCE({title}, '') || ' ' || COALESCE({description}, ''))"
+    match_sql = vector_sql + " @@ plainto_tsquery('english', %s)"
+    rank_sql = 'ts_rank(' + vector_sql + ", plainto_tsquery('english', %s))"
+
+
+class InvertedIndexSearchEngine(SearchEngine):
+    """
+    In-process inverted index for SQLite and tests.
+
+    The index is built from the database on first search and kept up to date
+    from the Product save/delete signals. Every term has to match; results are
+    ranked by tf-idf with title hits weighted above description hits.
+    """
+    title_weight = 2.0
+    token_pattern = re.compile(r'\w+')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.postings = defaultdict(dict)   # term → {product_id: weighted tf}
+            self.documents = {}                 # product_id → terms
+            self.built = False
+
+    def tokenize(self, text):
+        return self.token_pattern.findall((text or '').lower())
+
+    def build(self):
+        with self.lock:
+            if self.built:
+                return
+            for product_id, title, description in Product.objects.values_list('id', 'title', 'description').iterator():
+                self._add(product_id, title, description)
+            self.built = True
+
+    def index(self, product):
+        with self.lock:
+            if not self.built:
+                return
+            self._discard(product.id)
+            self._add(product.id, product.title, product.description)
+
+    def remove(self, product_id):
+        with self.lock:
+            if self.built:
+                self._discard(product_id)
+
+    def search(self, queryset, terms):
+        self.build()
+        scores = self.score([token for term in terms for token in self.tokenize(term)])
+
+        queryset = queryset.filter(id__in=scores)
+        if scores:
+            rank = Case(
+                *[When(id=product_id, then=Value(score)) for product_id, score in scores.items()],
+                output_field=FloatField()
+            )
+            queryset = queryset.annotate(**{self.rank_field: rank})
+        return self.order(queryset) if scores else queryset
+
+    def score(self, tokens):
+        with self.lock:
+            if not tokens:
+                return {}
+            postings = [self.postings.get(token, {}) for token in tokens]
+            matches = set.intersection(*(set(posting) for posting in postings))
+            total = len(self.documents)
+
+            scores = {}
+            for product_id in matches:
+                scores[product_id] = sum(
+                    posting[product_id] * math.log(1 + total / len(posting))
+                    for posting in postings
+                )
+            return scores
+
+    def _add(self, product_id, title, description):
+        weights = defaultdict(float)
+        for token in self.tokenize(title):
+            weights[token] += self.title_weight
+        for token in self.tokenize(description):
+            weights[token] += 1.0
+
+        for token, weight in weights.items():
+            self.postings[token][product_id] = weight
+        self.documents[product_id] = list(weights)
+
+    def _discard(self, product_id):
+        for token in self.documents.pop(product_id, []):
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(product_id, None)
+                if not posting:
+                    del self.postings[token]
+
+
+SEARCH_ENGINES = {
+    'mysql': MySQLSearchEngine,
+    'postgresql': PostgreSQLSearchEngine,
+}
+
+_engine = None
+
+
+def get_search_engine():
+    """
+    Returns the engine for the default database, or STORE_SEARCH_ENGINE
+    (a dotted path) when it is set.
+    """
+    global _engine
+    if _engine is None:
+        path = getattr(settings, 'STORE_SEARCH_ENGINE', None)
+        engine_class = import_string(path) if path else SEARCH_ENGINES.get(connection.vendor, InvertedIndexSearchEngine)
+        _engine = engine_class()
+    return _engine
@@ -1,14 +1,19 @@
 import datetime
-from decimal import Decimal
 from django.db import transaction
 from rest_framework import serializers
-from store.signals import order_created
+from core.profiling import TimedSerializerMixin, serializer_timer
+from tags.models import TaggedItem
+from tags.serializers import TaggedListSerializer, TagsField
 
 
-from .models import Cart, CartItem, Collection, Customer, Order, OrderItem, Product, ProductImage, Review
+from .cache import get_customer_id
+from .checkout import InsufficientInventory, place_order
+from .outbox import record_order_event
+from .uploads import store_upload
+from .models import Cart, CartItem, Collection, Customer, CustomerOrderSummary, Order, OrderItem, Product, ProductImage, Review, SalesBucket
 
 
-class CollectionSerializer(serializers.ModelSerializer):
+class CollectionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Collection
@@ -33,27 +38,97 @@ class ProductImageSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         product_id = self.context['product_id']
-        return ProductImage.objects.create(product_id=product_id, **validated_data)
+        return ProductImage.objects.create(product_id=product_id, **self.store_image(validated_data))
 
+    def update(self, instance, validated_data):
+        return super().update(instance, self.store_image(validated_data))
 
+    @staticmethod
+    def store_image(validated_data):
+        # Stored once per distinct content, rows only reference the name
+        if 'image' in validated_data:
+            upload_to = ProductImage._meta.get_field('image').upload_to
+            validated_data['image'] = store_upload(validated_data['image'], upload_to)
+        return validated_data
 
-class ProductSerializer(serializers.ModelSerializer):
+
+
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     images  = ProductImageSerializer(many=True,read_only=True)
+    tags = TagsField()
 
     class Meta:
         model = Product
-        fields = ['id', 'title','description', 'slug', 'inventory', 'unit_price', 'price_with_tax', 'collection','images']
+        fields = ['id', 'title','description', 'slug', 'inventory', 'unit_price', 'price_with_tax', 'collection','images', 'tags']
+        # Loads the tags of a whole page with one query
+        list_serializer_class = TaggedListSerializer
         # fields = '__all__' # bad practice - lazy dev
 
-    price_with_tax = serializers.SerializerMethodField(method_name='calculate_tax')  # Custom field
+    # Stored on the row from the collection's tax rate, see store.tax
+    price_with_tax = serializers.DecimalField(max_digits=8, decimal_places=2, read_only=True)
 
-    def calculate_tax(self, product:Product):
-        return product.unit_price * Decimal(1.1)
-    
     def get_image(self, product:Product):
         return product.images.last()
 
 
+class ProductReadSerializer:
+    """
+    Read-only equivalent of ProductSerializer(many=True) for list responses.
+
+    Takes `.values(*ProductReadSerializer.row_fields)` rows, loads the images
+    and tags of the whole page with one query each and builds the dicts directly instead of
+    running every DRF field's to_representation. The output is the same JSON
+    as ProductSerializer's.
+    """
+    row_fields = ['id', 'title', 'description', 'slug', 'inventory', 'unit_price', 'price_with_tax', 'collection_id']
+
+    def __init__(self, rows, context=None):
+        self.rows = rows
+        self.context = context or {}
+        decimal = serializers.DecimalField(max_digits=8, decimal_places=2)
+        self.to_decimal = decimal.to_representation
+
+    def get_images(self, product_ids):
+        request = self.context.get('request')
+        storage = ProductImage._meta.get_field('image').storage
+        images = {product_id: [] for product_id in product_ids}
+        rows = (ProductImage.objects.filter(product_id__in=product_ids)
+                .order_by('id').values_list('product_id', 'id', 'image'))
+        for product_id, image_id, name in rows:
+            url = None
+            if name:
+                url = storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+            images[product_id].append({'id': image_id, 'image': url})
+        return images
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return self.build(list(self.rows))
+
+    def build(self, rows):
+        images = self.get_images([row['id'] for row in rows])
+        tags = TaggedItem.objects.get_tags_for_many((Product, row['id']) for row in rows)
+        to_decimal = self.to_decimal
+        return [
+            {
+                'id': row['id'],
+                'title': row['title'],
+                'description': row['description'],
+                'slug': row['slug'],
+                'inventory': row['inventory'],
+                'unit_price': to_decimal(row['unit_price']),
+                'price_with_tax': to_decimal(row['price_with_tax']),
+                'collection': row['collection_id'],
+                'images': images[row['id']],
+                'tags': [tag.label for tag in tags[(Product, row['id'])]],
+            }
+            for row in rows
+        ]
+
+
 class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -86,37 +161,49 @@ class CartItemSerializer(serializers.ModelSerializer):
 class AddCartItemSerializer(serializers.ModelSerializer):
     product_id = serializers.IntegerField()
 
-    def validate_product_id(self, value):
-        if not Product.objects.filter(pk=value).exists():
-            raise serializers.ValidationError('Not Product found with given ID.')
-        return value
-
     def save(self, **kwargs):
         cart_id = self.context["cart_id"]
         product_id = self.validated_data['product_id']
         quantity = self.validated_data['quantity']
 
-        try:
-            cart_item = CartItem.objects.get(cart_id=cart_id, product_id=product_id)
-            cart_item.quantity += quantity
-            cart_item.save()
-            self.instance = cart_item
-        except CartItem.DoesNotExist:
-            self.instance = CartItem.objects.create(cart_id=cart_id, **self.validated_data)
+        items = CartItem.objects.add_products(cart_id, {product_id: quantity})
+        if not items:
+            raise serializers.ValidationError({'product_id': ['Not Product found with given ID.']})
 
+        self.instance = items[0]
         return self.instance
     
     class Meta:
         model = CartItem
         fields = ['id', 'product_id', 'quantity']
 
+
+class AddCartItemsSerializer(serializers.Serializer):
+    items = AddCartItemSerializer(many=True, allow_empty=False, max_length=100)
+
+    def save(self, **kwargs):
+        cart_id = self.context["cart_id"]
+        quantities = {}
+        for item in self.validated_data['items']:
+            quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
+
+        with transaction.atomic():
+            items = CartItem.objects.add_products(cart_id, quantities)
+            missing = set(quantities) - {item.product_id for item in items}
+            if missing:
+                raise serializers.ValidationError(
+                    {'items': [f'Not Product found with given ID {product_id}.' for product_id in sorted(missing)]})
+
+        self.instance = sorted(items, key=lambda item: item.product_id)
+        return self.instance
+
 class UpdateCartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
         fields = ['quantity']
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
    
     class Meta:
@@ -131,7 +218,32 @@ class CartSerializer(serializers.ModelSerializer):
         return sum([item.quantity * item.product.unit_price for item in cart.items.all()])
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CartItemRowProductSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='product_id')
+    title = serializers.CharField(source='product__title')
+    unit_price = serializers.DecimalField(max_digits=6, decimal_places=2, source='product__unit_price')
+
+
+class CartItemRowSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    product = CartItemRowProductSerializer(source='*')
+    quantity = serializers.IntegerField()
+    total_price = serializers.ReadOnlyField()
+
+
+# Same output as CartSerializer, built from the values rows of
+# Cart.objects.with_total_price() and CartItem.objects.rows_for()
+class CartReadSerializer(TimedSerializerMixin, serializers.Serializer):
+    id = serializers.UUIDField()
+    items = CartItemRowSerializer(many=True)
+    total_price = serializers.SerializerMethodField(method_name='get_total_price')
+
+    def get_total_price(self, cart):
+        # Sum() is NULL for an empty cart, CartSerializer returns sum([]) == 0
+        return cart['total_price'] if cart['total_price'] is not None else 0
+
+
+class CustomerSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
@@ -139,6 +251,12 @@ class CustomerSerializer(serializers.ModelSerializer):
         fields = ['id', 'user_id', 'phone',"birth_date" ,"membership"]    
 
 
+class CustomerOrderSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomerOrderSummary
+        fields = ['customer_id', 'orders_count', 'lifetime_spend', 'last_order_at']
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product = SimpleProductSerializer()
 
@@ -147,13 +265,19 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product','quantity','unit_price']
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
 
     class Meta:
         model = Order
         fields =  ['id', 'payment_status', 'customer', 'placed_at', 'items']
 
+class SalesBucketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SalesBucket
+        fields = ['dimension', 'granularity', 'object_id', 'bucket_start', 'revenue', 'units', 'orders_count']
+
+
 class CreateOrderSerialzer(serializers.Serializer):
     cart_id = serializers.UUIDField()
 
@@ -168,22 +292,17 @@ class CreateOrderSerialzer(serializers.Serializer):
     def save(self, **kwargs):
         with transaction.atomic():
             cart_id = self.validated_data['cart_id']
-            customer = Customer.objects.get(user_id=self.context['user_id'])
-            order = Order.objects.create(customer=customer)
-
-            cart_items = CartItem.objects.select_related('product').filter(cart_id=cart_id)
-            order_items = [
-                OrderItem(
-                    order=order,
-                    product=item.product,
-                    unit_price=item.product.unit_price,
-                    quantity= item.quantity
-                ) for item in cart_items
-            ]
-            OrderItem.objects.bulk_create(order_items)
-            Cart.objects.get(id=cart_id).delete()
+            customer_id = get_customer_id(self.context['user_id'])
+
+            try:
+                order = place_order(cart_id, customer_id)
+            except InsufficientInventory as error:
+                raise serializers.ValidationError({'cart_id': [
+                    f'Only {available} left of product {product_id}, {requested} requested.'
+                    for product_id, requested, available in error.products
+                ]})
             
-            order_created.send_robust(self.__class__, order=order)
+            record_order_event(order)
             return order
 
 class UpdateOrderSerializer(serializers.ModelSerializer):
@@ -1,12 +1,173 @@
 
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
 
-from store.models import Customer
+from store import reporting
+from store.cache import forget_customer_id, product_cache
+from store.models import Collection, Customer, Order, OrderItem, Product, ProductImage
+from store.rollups import (
+    record_order_deleted, record_order_placed, record_payment_status_change, refresh_spend_on_commit,
+)
+from store.search import get_search_engine
+from store.tax import calculate_price_with_tax, refresh_prices_with_tax
+from tags.models import Tag, TaggedItem
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_customer_for_new_user(sender, **kwargs):
     if kwargs['created']:
-        Customer.objects.create(user=kwargs['instance'])
\ No newline at end of file
+        forget_customer_id(kwargs['instance'].id)
+        Customer.objects.create(user=kwargs['instance'])
+
+
+@receiver(post_delete, sender=Customer)
+def forget_deleted_customer_id(sender, **kwargs):
+    forget_customer_id(kwargs['instance'].user_id)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, **kwargs):
+    get_search_engine().index(kwargs['instance'])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, **kwargs):
+    get_search_engine().remove(kwargs['instance'].id)
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_collection(sender, **kwargs):
+    instance = kwargs['instance']
+    instance._previous_collection_id = None
+    if instance.pk is not None:
+        instance._previous_collection_id = (
+            Product.objects.select_for_update().filter(pk=instance.pk)
+            .values_list('collection_id', flat=True).first())
+
+
+@receiver(pre_save, sender=Product)
+def set_price_with_tax(sender, **kwargs):
+    instance = kwargs['instance']
+    tax_rate = Collection.objects.filter(pk=instance.collection_id).values_list('tax_rate', flat=True).first()
+    if tax_rate is not None:
+        instance.price_with_tax = calculate_price_with_tax(instance.unit_price, tax_rate)
+
+
+@receiver(post_save, sender=Product)
+def update_products_count_on_save(sender, **kwargs):
+    instance = kwargs['instance']
+    previous_collection_id = getattr(instance, '_previous_collection_id', None)
+    if kwargs['created']:
+        Collection.objects.filter(pk=instance.collection_id).update(products_count=F('products_count') + 1)
+    elif previous_collection_id is not None and previous_collection_id != instance.collection_id:
+        Collection.objects.filter(pk=previous_collection_id).update(products_count=F('products_count') - 1)
+        Collection.objects.filter(pk=instance.collection_id).update(products_count=F('products_count') + 1)
+
+
+@receiver(post_delete, sender=Product)
+def update_products_count_on_delete(sender, **kwargs):
+    Collection.objects.filter(pk=kwargs['instance'].collection_id).update(products_count=F('products_count') - 1)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_cache(sender, **kwargs):
+    instance = kwargs['instance']
+    scopes = ['all', f'product:{instance.id}', f'collection:{instance.collection_id}']
+    previous_collection_id = getattr(instance, '_previous_collection_id', None)
+    if previous_collection_id is not None:
+        scopes.append(f'collection:{previous_collection_id}')
+    product_cache.invalidate(*scopes)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_product_image_cache(sender, **kwargs):
+    product_id = kwargs['instance'].product_id
+    collection_id = Product.objects.filter(pk=product_id).values_list('collection_id', flat=True).first()
+    product_cache.invalidate('all', f'product:{product_id}', f'collection:{collection_id}')
+
+
+@receiver(pre_save, sender=Collection)
+def remember_previous_tax_rate(sender, **kwargs):
+    instance = kwargs['instance']
+    instance._previous_tax_rate = None
+    if instance.pk is not None:
+        instance._previous_tax_rate = (
+            Collection.objects.filter(pk=instance.pk).values_list('tax_rate', flat=True).first())
+
+
+@receiver(post_save, sender=Collection)
+def refresh_prices_on_tax_rate_change(sender, **kwargs):
+    instance = kwargs['instance']
+    previous_tax_rate = getattr(instance, '_previous_tax_rate', None)
+    if previous_tax_rate is not None and previous_tax_rate != instance.tax_rate:
+        refresh_prices_with_tax([instance.id])
+
+
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def invalidate_product_tags_cache(sender, **kwargs):
+    instance = kwargs['instance']
+    if instance.content_type_id != ContentType.objects.get_for_model(Product).id:
+        return
+    collection_id = Product.objects.filter(pk=instance.object_id).values_list('collection_id', flat=True).first()
+    product_cache.invalidate('all', f'product:{instance.object_id}', f'collection:{collection_id}')
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_renamed_tag_cache(sender, **kwargs):
+    if kwargs['created']:
+        return
+    product_ids = TaggedItem.objects.filter(
+        tag=kwargs['instance'], content_type=ContentType.objects.get_for_model(Product)).values('object_id')
+    collection_ids = (Product.objects.filter(id__in=product_ids)
+                      .order_by().values_list('collection_id', flat=True).distinct())
+    if collection_ids:
+        # a tag can be on any number of products, bump the shared detail scope
+        product_cache.invalidate('all', 'details', *[f'collection:{collection_id}' for collection_id in collection_ids])
+
+
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+def invalidate_collection_cache(sender, **kwargs):
+    product_cache.invalidate('all', f'collection:{kwargs["instance"].id}')
+
+
+@receiver(pre_save, sender=Order)
+def remember_previous_payment_status(sender, **kwargs):
+    instance = kwargs['instance']
+    instance._previous_payment_status = None
+    if instance.pk is not None:
+        instance._previous_payment_status = (
+            Order.objects.select_for_update().filter(pk=instance.pk)
+            .values_list('payment_status', flat=True).first())
+
+
+@receiver(post_save, sender=Order)
+def update_order_summary(sender, **kwargs):
+    instance = kwargs['instance']
+    if kwargs['created']:
+        record_order_placed(instance)
+    elif instance._previous_payment_status is not None:
+        record_payment_status_change(instance, instance._previous_payment_status)
+        reporting.record_payment_status_change(instance, instance._previous_payment_status)
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_from_summary(sender, **kwargs):
+    record_order_deleted(kwargs['instance'])
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def update_spend_for_paid_order_item(sender, **kwargs):
+    # Checkout bulk-creates the items of pending orders, this is for
+    # items added to or removed from completed orders (admin, imports)
+    instance = kwargs['instance']
+    customer_id = (Order.objects.filter(pk=instance.order_id, payment_status=Order.PAYMENT_STATUS_COMPLETE)
+                   .values_list('customer_id', flat=True).first())
+    if customer_id is not None:
+        refresh_spend_on_commit(customer_id)
@@ -0,0 +1,146 @@
+import random
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from .catalog import recount_products, reset_sequences
+from .models import Cart, CartItem, Collection, Customer, Order, OrderItem, Product, ProductImage
+from .rollups import rebuild_summaries
+from .tax import calculate_price_with_tax
+
+WORDS = (
+    'organic fresh classic premium spicy sweet roasted green black herbal crunchy smoked golden '
+    'wild mini family deluxe honey lemon mint garlic vanilla cocoa berry maple ginger pepper'
+).split()
+NOUNS = (
+    'tea coffee bread cheese sauce candle notebook pen toy biscuit cereal soap shampoo brush '
+    'jam oil rice pasta noodle chips juice soda bar cookie mug'
+).split()
+
+
+class SyntheticData:
+    """
+    Deterministic store data for benchmarks and load tests: the same seed
+    and sizes give the same rows on an empty database. Rows are written with
+    bulk_create in batches, so the derived columns the signal handlers
+    normally maintain (price_with_tax, products_count, order summaries) are
+    filled in here.
+    """
+
+    def __init__(self, seed=0, batch_size=5000):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.now = timezone.now().replace(microsecond=0)
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+    def bulk(self, model, objects):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                model.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+
+    def title(self):
+        return f'{self.random.choice(WORDS).title()} {self.random.choice(WORDS)} {self.random.choice(NOUNS)}'
+
+    @transaction.atomic
+    def generate(self, collections=10, products=1000, images_per_product=1, customers=100, carts=100,
+                 orders=500, max_items=5):
+        first_collection = self.next_id(Collection)
+        collection_rates = {}
+        collection_rows = []
+        for collection_id in range(first_collection, first_collection + collections):
+            rate = self.random.choice([Decimal('0.05'), Decimal('0.10'), Decimal('0.20')])
+            collection_rates[collection_id] = rate
+            collection_rows.append(Collection(id=collection_id, title=f'Collection {collection_id}', tax_rate=rate))
+        self.bulk(Collection, collection_rows)
+
+        first_product = self.next_id(Product)
+
+        def product_rows():
+            for product_id in range(first_product, first_product + products):
+                collection_id = self.random.randrange(first_collection, first_collection + collections)
+                unit_price = Decimal(self.random.randrange(100, 50000)) / 100
+                title = self.title()
+                yield Product(
+                    id=product_id, title=title, slug=f'{title.lower().replace(" ", "-")}-{product_id}',
+                    description=' '.join(self.random.choices(WORDS + NOUNS, k=12)),
+                    unit_price=unit_price, inventory=self.random.randrange(10, 1000),
+                    price_with_tax=calculate_price_with_tax(unit_price, collection_rates[collection_id]),
+                    collection_id=collection_id)
+        self.bulk(Product, product_rows())
+        recount_products(list(collection_rates))
+
+        self.bulk(ProductImage, (
+            ProductImage(product_id=product_id, image=f'store/images/synthetic/{product_id}-{index}.jpg')
+            for product_id in range(first_product, first_product + products)
+            for index in range(images_per_product)
+        ))
+
+        User = get_user_model()
+        first_user = self.next_id(User)
+        self.bulk(User, (
+            User(id=user_id, username=f'customer{user_id}', email=f'customer{user_id}@example.com',
+                 first_name='Customer', last_name=str(user_id), password='!')
+            for user_id in range(first_user, first_user + customers)
+        ))
+        first_customer = self.next_id(Customer)
+        self.bulk(Customer, (
+            Customer(id=first_customer + index, user_id=first_user + index, phone=f'555-{index:07d}')
+            for index in range(customers)
+        ))
+        customer_ids = range(first_customer, first_customer + customers)
+        product_ids = range(first_product, first_product + products)
+
+        cart_ids = []
+        for _ in range(carts):
+            cart = Cart.objects.create()
+            cart_ids.append(cart.id)
+        self.bulk(CartItem, (
+            CartItem(cart_id=cart_id, product_id=product_id, quantity=self.random.randrange(1, 4))
+            for cart_id in cart_ids
+            for product_id in self.random.sample(product_ids, min(max_items, products))[:self.random.randrange(1, max_items + 1)]
+        ))
+
+        first_order = self.next_id(Order)
+        statuses = [Order.PAYMENT_STATUS_COMPLETE] * 8 + [Order.PAYMENT_STATUS_PENDING, Order.PAYMENT_STATUS_FAILED]
+        self.bulk(Order, (
+            Order(id=order_id, customer_id=self.random.choice(customer_ids), payment_status=self.random.choice(statuses))
+            for order_id in range(first_order, first_order + orders)
+        ))
+        # placed_at is auto_now_add, spread the orders over the last year a day at a time
+        days = defaultdict(list)
+        for order_id in range(first_order, first_order + orders):
+            days[self.random.randrange(365)].append(order_id)
+        for day, order_ids in sorted(days.items()):
+            for start in range(0, len(order_ids), 1000):
+                Order.objects.filter(id__in=order_ids[start:start + 1000]).update(placed_at=self.now - timedelta(days=day))
+
+        self.bulk(OrderItem, (
+            OrderItem(order_id=order_id, product_id=product_id, quantity=self.random.randrange(1, 4), unit_price=0)
+            for order_id in range(first_order, first_order + orders)
+            for product_id in self.random.sample(product_ids, min(self.random.randrange(1, max_items + 1), products))
+        ))
+        OrderItem.objects.filter(order_id__gte=first_order).update(
+            unit_price=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('unit_price')[:1]))
+
+        reset_sequences(Collection, Product, User, Customer, Order)
+        rebuild_summaries()
+
+        return {
+            'collections': list(collection_rates),
+            'products': product_ids,
+            'customers': customer_ids,
+            'carts': cart_ids,
+            'orders': range(first_order, first_order + orders),
+        }
@@ -0,0 +1,32 @@
+from celery import shared_task
+from django.conf import settings
+
+from . import reaper, reporting
+from .outbox import dispatch_pending
+
+
+@shared_task
+def dispatch_order_events(batch_size=100):
+    # Failed events carry their own next_attempt_at, the beat run picks them up
+    dispatched, failed, has_more = dispatch_pending(batch_size)
+
+    if has_more:
+        dispatch_order_events.delay(batch_size)
+
+    return {'dispatched': dispatched, 'failed': failed}
+
+
+@shared_task
+def reap_expired_carts(ttl_days=None, batch_size=None):
+    return reaper.reap_expired_carts(
+        ttl_days if ttl_days is not None else settings.CART_TTL_DAYS,
+        batch_size or settings.CART_REAPER_BATCH_SIZE)
+
+
+@shared_task
+def refresh_sales_buckets(batch_size=None):
+    stats = reporting.refresh_sales_buckets(
+        batch_size or settings.REPORTING_BATCH_SIZE, settings.REPORTING_SETTLE_SECONDS)
+    if stats['has_more']:
+        refresh_sales_buckets.delay(batch_size)
+    return stats
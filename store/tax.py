@@ -0,0 +1,32 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Round
+
+from .cache import product_cache
+from .models import Collection, Product
+
+CENT = Decimal('0.01')
+
+
+def calculate_price_with_tax(unit_price, tax_rate):
+    return (Decimal(unit_price) * (1 + tax_rate)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def refresh_prices_with_tax(collection_ids=None):
+    """
+    Recomputes Product.price_with_tax in the database, for the given
+    collections or for every product, and returns the number of rows updated.
+    """
+    products = Product.objects.all()
+    if collection_ids is not None:
+        products = products.filter(collection_id__in=collection_ids)
+
+    tax_rate = Subquery(Collection.objects.filter(pk=OuterRef('collection_id')).values('tax_rate')[:1])
+    updated = products.order_by().update(price_with_tax=Round(F('unit_price') * (1 + tax_rate), 2))
+
+    if collection_ids is None:
+        collection_ids = Collection.objects.values_list('id', flat=True)
+    # One shared bump for the detail responses instead of one per product
+    product_cache.invalidate('all', 'details', *[f'collection:{collection_id}' for collection_id in collection_ids])
+    return updated
@@ -1,4 +1,5 @@
 from django.contrib.auth.models import User
+from django.core.cache import cache
 
 import pytest
 from rest_framework.test import APIClient
@@ -12,4 +13,9 @@ def api_client():
 def authenticate(api_client):
     def do_authenticate(is_staff=False):
         return api_client.force_authenticate(user=User(is_staff=is_staff))
-    return do_authenticate
\ No newline at end of file
+    return do_authenticate
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
@@ -0,0 +1,170 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from uuid import uuid4
+from store.models import Cart, CartItem, Product
+from store.reaper import reap_expired_carts
+from store.serializers import CartSerializer
+from rest_framework.renderers import JSONRenderer
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import pytest
+from rest_framework import status
+from model_bakery import baker
+
+
+@pytest.fixture
+def add_to_cart(api_client):
+    def do_add_to_cart(cart_id, item):
+        return api_client.post(f"/store/carts/{cart_id}/items/", item)
+    return do_add_to_cart
+
+
+@pytest.fixture
+def batch_add_to_cart(api_client):
+    def do_batch_add_to_cart(cart_id, items):
+        return api_client.post(f"/store/carts/{cart_id}/items/batch/", {"items": items}, format='json')
+    return do_batch_add_to_cart
+
+
+@pytest.mark.django_db
+class TestAddCartItem:
+
+    def test_if_product_is_added_twice_quantity_is_incremented(self, add_to_cart):
+        cart = baker.make(Cart)
+        product = baker.make(Product)
+
+        first = add_to_cart(cart.id, {"product_id": product.id, "quantity": 2})
+        second = add_to_cart(cart.id, {"product_id": product.id, "quantity": 3})
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert second.status_code == status.HTTP_201_CREATED
+        assert second.data == {"id": first.data['id'], "product_id": product.id, "quantity": 5}
+        assert CartItem.objects.get(cart=cart).quantity == 5
+
+    def test_if_backend_cannot_return_rows_items_are_read_back(self, monkeypatch):
+        # e.g. SQLite before 3.35, which has ON CONFLICT but no RETURNING
+        monkeypatch.setattr(type(connection.features), 'can_return_rows_from_bulk_insert', False)
+        cart = baker.make(Cart)
+        product = baker.make(Product)
+        CartItem.objects.add_products(cart.id, {product.id: 1})
+
+        [item] = CartItem.objects.add_products(cart.id, {product.id: 2})
+
+        assert (item.pk, item.quantity) == (CartItem.objects.get(cart=cart).pk, 3)
+
+    def test_if_product_does_not_exist_returns_400(self, add_to_cart):
+        cart = baker.make(Cart)
+
+        response = add_to_cart(cart.id, {"product_id": 999, "quantity": 1})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['product_id'] is not None
+
+
+@pytest.mark.django_db
+class TestBatchAddCartItems:
+
+    def test_if_items_are_valid_returns_201(self, batch_add_to_cart):
+        cart = baker.make(Cart)
+        first, second = baker.make(Product, _quantity=2)
+        baker.make(CartItem, cart=cart, product=first, quantity=1)
+
+        response = batch_add_to_cart(cart.id, [
+            {"product_id": first.id, "quantity": 2},
+            {"product_id": second.id, "quantity": 1},
+            {"product_id": second.id, "quantity": 4},
+        ])
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [(item['product_id'], item['quantity']) for item in response.data] == [(first.id, 3), (second.id, 5)]
+
+    def test_if_any_product_does_not_exist_nothing_is_added(self, batch_add_to_cart):
+        cart = baker.make(Cart)
+        product = baker.make(Product)
+
+        response = batch_add_to_cart(cart.id, [
+            {"product_id": product.id, "quantity": 1},
+            {"product_id": 999, "quantity": 1},
+        ])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not CartItem.objects.filter(cart=cart).exists()
+
+
+@pytest.mark.django_db
+class TestRetrieveCart:
+
+    def test_if_cart_has_items_returns_same_data_as_model_serializer(self, api_client):
+        cart = baker.make(Cart)
+        for quantity in (1, 3):
+            baker.make(CartItem, cart=cart, product=baker.make(Product, unit_price=Decimal('12.35')), quantity=quantity)
+
+        response = api_client.get(f"/store/carts/{cart.id}/")
+
+        expected = CartSerializer(Cart.objects.prefetch_related('items__product').get(id=cart.id)).data
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(JSONRenderer().render(response.data)) == json.loads(JSONRenderer().render(expected))
+        assert response.data['total_price'] == Decimal('49.40')
+
+    def test_if_cart_is_empty_total_is_0(self, api_client):
+        cart = baker.make(Cart)
+
+        response = api_client.get(f"/store/carts/{cart.id}/")
+
+        assert response.data == {'id': str(cart.id), 'items': [], 'total_price': 0}
+
+    def test_if_cart_does_not_exist_returns_404(self, api_client):
+        response = api_client.get(f"/store/carts/{uuid4()}/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestReapCarts:
+
+    def test_if_carts_are_deleted_with_items_other_carts_are_kept(self, django_assert_num_queries):
+        carts = baker.make(Cart, _quantity=3)
+        for cart in carts:
+            for product in baker.make(Product, _quantity=2):
+                baker.make(CartItem, cart=cart, product=product)
+
+        # one DELETE for the items, one for the carts, no SELECT
+        with django_assert_num_queries(2) as queries:
+            assert Cart.objects.delete_with_items([carts[0].id, carts[1].id]) == (2, 4)
+
+        assert [query['sql'].split()[0] for query in queries.captured_queries] == ['DELETE', 'DELETE']
+        assert list(Cart.objects.values_list('id', flat=True)) == [carts[2].id]
+        assert CartItem.objects.filter(cart=carts[2]).count() == 2
+
+    def test_if_carts_are_expired_they_are_deleted_with_items(self):
+        expired = baker.make(Cart, _quantity=3)
+        Cart.objects.filter(id__in=[cart.id for cart in expired]).update(created_at=timezone.now() - timedelta(days=31))
+        fresh = baker.make(Cart)
+        for cart in expired + [fresh]:
+            baker.make(CartItem, cart=cart, product=baker.make(Product))
+        out = StringIO()
+
+        call_command('reap_carts', '--ttl-days=30', '--batch-size=2', stdout=out)
+
+        assert list(Cart.objects.values_list('id', flat=True)) == [fresh.id]
+        assert list(CartItem.objects.values_list('cart_id', flat=True)) == [fresh.id]
+        assert 'Deleted 3 carts and 3 items in 2 batches' in out.getvalue()
+
+    def test_if_carts_are_reaped_each_batch_takes_three_queries(self):
+        expired = baker.make(Cart, _quantity=3)
+        Cart.objects.filter(id__in=[cart.id for cart in expired]).update(created_at=timezone.now() - timedelta(days=31))
+        for cart in expired:
+            baker.make(CartItem, cart=cart, product=baker.make(Product))
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = reap_expired_carts(ttl_days=30, batch_size=2)
+
+        # the batch transactions are savepoints inside the test's transaction
+        statements = [query['sql'].split()[0] for query in queries.captured_queries
+                      if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        assert statements == ['SELECT', 'DELETE', 'DELETE'] * 2
+        assert (stats['carts'], stats['items'], stats['batches']) == (3, 3, 2)
@@ -0,0 +1,146 @@
+import json
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from store.models import Collection, Product, Promotion
+import pytest
+
+
+@pytest.fixture
+def write_file(tmp_path):
+    def do_write_file(name, text):
+        path = tmp_path / name
+        path.write_text(text)
+        return str(path)
+    return do_write_file
+
+
+def import_catalog(path, *args):
+    out = StringIO()
+    call_command('import_catalog', path, *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+class TestImportCatalog:
+
+    def test_if_csv_is_imported_rows_are_upserted(self, write_file):
+        collections = write_file('collections.csv', 'id,title,tax_rate\n1,Tea,0.05\n2,Coffee,0.10\n')
+        products = write_file('products.csv', (
+            'id,title,slug,description,unit_price,inventory,collection_id\n'
+            '10,Green tea,green-tea,,4.00,5,1\n'
+            '11,Espresso,espresso,Strong,8.00,3,2\n'))
+        import_catalog(collections, '--model', 'collection')
+        import_catalog(products)
+
+        out = import_catalog(write_file('update.csv', (
+            'id,title,slug,description,unit_price,inventory,collection_id\n'
+            '11,Espresso,espresso,Stronger,10.00,3,1\n')))
+
+        assert 'rows/s' in out
+        espresso = Product.objects.get(id=11)
+        assert (espresso.description, espresso.unit_price, espresso.price_with_tax) == (
+            'Stronger', Decimal('10.00'), Decimal('10.50'))
+        assert Product.objects.get(id=10).description is None
+        assert dict(Collection.objects.values_list('id', 'products_count')) == {1: 2, 2: 0}
+
+    def test_if_jsonl_has_promotions_they_are_linked(self, write_file):
+        Collection.objects.create(id=1, title='Tea')
+        import_catalog(write_file('promotions.jsonl', '{"id": 1, "description": "Sale", "discount": 0.2}\n'),
+                       '--model', 'promotion')
+
+        import_catalog(write_file('products.jsonl', json.dumps({
+            'id': 10, 'title': 'Tea', 'slug': 'tea', 'unit_price': '2.00', 'inventory': 1,
+            'collection_id': 1, 'promotions': [1]}) + '\n'))
+
+        assert list(Product.objects.get(id=10).promotions.all()) == [Promotion.objects.get(id=1)]
+
+    def test_if_promotion_is_dropped_from_row_it_is_unlinked(self, write_file):
+        Collection.objects.create(id=1, title='Tea')
+        Promotion.objects.bulk_create([Promotion(id=1, description='Sale', discount=0.2),
+                                       Promotion(id=2, description='Bundle', discount=0.1)])
+        row = {'id': 10, 'title': 'Tea', 'slug': 'tea', 'unit_price': '2.00', 'inventory': 1, 'collection_id': 1}
+        import_catalog(write_file('products.jsonl', json.dumps({**row, 'promotions': [1, 2]}) + '\n'))
+
+        import_catalog(write_file('update.jsonl', json.dumps({**row, 'promotions': [2]}) + '\n'))
+
+        assert list(Product.objects.get(id=10).promotions.values_list('id', flat=True)) == [2]
+
+    def test_if_collection_tax_rate_changes_product_prices_are_refreshed(self, write_file):
+        import_catalog(write_file('collections.csv', 'id,title,tax_rate\n1,Tea,0.05\n'), '--model', 'collection')
+        import_catalog(write_file('products.csv', (
+            'id,title,slug,description,unit_price,inventory,collection_id\n10,Tea,tea,,10.00,5,1\n')))
+
+        import_catalog(write_file('update.csv', 'id,title,tax_rate\n1,Tea,0.20\n'), '--model', 'collection')
+
+        assert Product.objects.get(id=10).price_with_tax == Decimal('12.00')
+
+    def test_if_row_leaves_out_price_stored_price_is_used(self, write_file):
+        Collection.objects.create(id=1, title='Tea', tax_rate=Decimal('0.10'))
+        import_catalog(write_file('products.csv', (
+            'id,title,slug,description,unit_price,inventory,collection_id\n10,Tea,tea,,10.00,5,1\n')))
+
+        import_catalog(write_file('update.csv', 'id,title,inventory\n10,Green tea,7\n'))
+
+        product = Product.objects.get(id=10)
+        assert (product.title, product.inventory, product.price_with_tax) == ('Green tea', 7, Decimal('11.00'))
+
+    def test_if_row_has_only_some_columns_others_are_kept(self, write_file):
+        Collection.objects.create(id=1, title='Tea', tax_rate=Decimal('0.10'))
+        import_catalog(write_file('products.csv', (
+            'id,title,slug,description,unit_price,inventory,collection_id\n10,Tea,tea,Loose leaf,10.00,5,1\n')))
+
+        import_catalog(write_file('update.jsonl', json.dumps({'id': 10, 'unit_price': '9.00'}) + '\n'))
+
+        product = Product.objects.get(id=10)
+        assert (product.title, product.slug, product.description, product.inventory, product.collection_id) == (
+            'Tea', 'tea', 'Loose leaf', 5, 1)
+        assert (product.unit_price, product.price_with_tax) == (Decimal('9.00'), Decimal('9.90'))
+
+    @pytest.mark.parametrize('line, message', [
+        ('10,Tea,tea,,2.00,1,99', 'Product row 10 has unknown collection_id 99'),
+        ('10,Tea,tea,,,1,1', 'Product row 10 has an invalid unit_price'),
+    ])
+    def test_if_product_row_is_invalid_error_names_row(self, write_file, line, message):
+        Collection.objects.create(id=1, title='Tea')
+        path = write_file('products.csv', 'id,title,slug,description,unit_price,inventory,collection_id\n' + line)
+
+        with pytest.raises(CommandError, match=message):
+            import_catalog(path)
+
+    def test_if_new_product_has_no_price_error_names_row(self, write_file):
+        Collection.objects.create(id=1, title='Tea')
+        path = write_file('products.jsonl', json.dumps({'id': 10, 'title': 'Tea', 'collection_id': 1}) + '\n')
+
+        with pytest.raises(CommandError, match='Product row 10 has no unit_price'):
+            import_catalog(path)
+
+    def test_if_import_fails_rerun_resumes_after_last_batch(self, write_file):
+        Collection.objects.create(id=1, title='Tea')
+        lines = [f'{i},Tea {i},tea-{i},,2.00,1,1' for i in range(1, 6)]
+        path = write_file('products.csv', '\n'.join(
+            ['id,title,slug,description,unit_price,inventory,collection_id'] + lines[:4] + ['6,Bad,bad,,2.00,1,99']))
+
+        with pytest.raises(CommandError, match='after 4 rows'):
+            import_catalog(path, '--batch-size', '2')
+        with open(path, 'w') as file:
+            file.write('\n'.join(['id,title,slug,description,unit_price,inventory,collection_id'] + lines))
+        out = import_catalog(path, '--batch-size', '2')
+
+        assert 'Resuming after row 4' in out
+        assert Product.objects.count() == 5
+
+    def test_if_import_is_resumed_collections_of_earlier_batches_are_recounted(self, write_file):
+        Collection.objects.create(id=1, title='Tea')
+        header = 'id,title,slug,description,unit_price,inventory,collection_id'
+        lines = [f'{i},Tea {i},tea-{i},,2.00,1,1' for i in range(1, 5)]
+        path = write_file('products.csv', '\n'.join([header] + lines[:2] + ['3,Bad,bad,,2.00,1,99']))
+
+        with pytest.raises(CommandError, match='after 2 rows'):
+            import_catalog(path, '--batch-size', '2')
+        with open(path, 'w') as file:
+            file.write('\n'.join([header] + lines[:2]))
+        import_catalog(path, '--batch-size', '2')
+
+        assert Collection.objects.get(id=1).products_count == 2
@@ -1,3 +1,5 @@
+from io import StringIO
+from django.core.management import call_command
 from store.models import Collection, Product
 from django.contrib.auth.models import User
 import pytest
@@ -161,3 +163,41 @@ class TestUpdateCollection:
         assert response.data['id'] == collection.id
     
 
+
+@pytest.mark.django_db
+class TestCollectionProductsCount:
+
+    def test_if_products_are_added_moved_and_deleted_count_follows(self, api_client):
+        source, target = baker.make(Collection, _quantity=2)
+        products = baker.make(Product, collection=source, _quantity=3)
+
+        products[0].collection = target
+        products[0].save()
+        products[1].delete()
+
+        assert api_client.get(f"/store/collections/{source.id}/").data['products_count'] == 1
+        assert api_client.get(f"/store/collections/{target.id}/").data['products_count'] == 1
+
+    def test_if_collection_is_updated_concurrent_count_is_kept(self, patch_collection, authenticate):
+        authenticate(True)
+        collection = baker.make(Collection)
+        stale = Collection.objects.get(pk=collection.id)
+        baker.make(Product, collection=collection, _quantity=2)
+
+        stale.title = 'Renamed'
+        stale.save()
+        response = patch_collection(collection.id, {'title': 'Renamed again'})
+
+        assert response.data['products_count'] == 2
+        collection.refresh_from_db()
+        assert (collection.title, collection.products_count) == ('Renamed again', 2)
+
+    def test_if_count_drifts_reconcile_command_fixes_it(self):
+        collection = baker.make(Collection)
+        baker.make(Product, collection=collection, _quantity=2)
+        Collection.objects.filter(pk=collection.id).update(products_count=7)
+
+        call_command('reconcile_products_count', stdout=StringIO())
+
+        collection.refresh_from_db()
+        assert collection.products_count == 2
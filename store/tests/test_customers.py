@@ -0,0 +1,92 @@
+from decimal import Decimal
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from io import StringIO
+from store.models import CustomerOrderSummary, Order, OrderItem
+import pytest
+from rest_framework import status
+from model_bakery import baker
+
+
+@pytest.fixture
+def customer():
+    return baker.make('core.User').customer
+
+
+@pytest.fixture
+def place_order(customer):
+    def do_place_order(total, payment_status=Order.PAYMENT_STATUS_PENDING):
+        order = baker.make(Order, customer=customer, payment_status=payment_status)
+        baker.make(OrderItem, order=order, quantity=2, unit_price=Decimal(total) / 2)
+        return order
+    return do_place_order
+
+
+@pytest.fixture
+def get_history(api_client):
+    def do_get_history(customer_id):
+        user = baker.make('core.User')
+        user.user_permissions.add(Permission.objects.get(codename='view_history'))
+        api_client.force_authenticate(user=user)
+        return api_client.get(f"/store/customers/{customer_id}/history/")
+    return do_get_history
+
+
+@pytest.mark.django_db
+class TestCustomerHistory:
+
+    def test_if_orders_are_paid_summary_tracks_count_and_spend(self, customer, place_order, get_history):
+        first = place_order('10.00')
+        place_order('4.00')
+        first.payment_status = Order.PAYMENT_STATUS_COMPLETE
+        first.save()
+
+        response = get_history(customer.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['orders_count'] == 2
+        assert response.data['lifetime_spend'] == Decimal('10.00')
+
+    def test_if_payment_is_reverted_spend_is_removed(self, customer, place_order):
+        order = place_order('10.00')
+        order.payment_status = Order.PAYMENT_STATUS_COMPLETE
+        order.save()
+
+        order.payment_status = Order.PAYMENT_STATUS_FAILED
+        order.save()
+
+        assert CustomerOrderSummary.objects.get(customer=customer).lifetime_spend == 0
+
+    def test_if_order_is_placed_paid_spend_includes_its_items(self, customer, place_order,
+                                                               django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            place_order('8.00', payment_status=Order.PAYMENT_STATUS_COMPLETE)
+
+        summary = CustomerOrderSummary.objects.get(customer=customer)
+        assert (summary.orders_count, summary.lifetime_spend) == (1, Decimal('8.00'))
+
+    def test_if_order_is_deleted_it_is_removed_from_summary(self, customer, place_order):
+        place_order('3.00', payment_status=Order.PAYMENT_STATUS_COMPLETE)
+        order = place_order('5.00', payment_status=Order.PAYMENT_STATUS_COMPLETE)
+
+        order.items.all().delete()
+        order.delete()
+
+        summary = CustomerOrderSummary.objects.get(customer=customer)
+        assert (summary.orders_count, summary.lifetime_spend) == (1, Decimal('3.00'))
+
+    def test_if_customer_has_no_orders_returns_empty_summary(self, customer, get_history):
+        response = get_history(customer.id)
+
+        assert response.data['orders_count'] == 0
+        assert response.data['last_order_at'] is None
+
+    def test_if_summary_drifts_rebuild_command_fixes_it(self, customer, place_order):
+        place_order('6.00', payment_status=Order.PAYMENT_STATUS_COMPLETE)
+        CustomerOrderSummary.objects.filter(customer=customer).update(orders_count=7, lifetime_spend=0)
+
+        call_command('rebuild_order_summaries', stdout=StringIO())
+
+        summary = CustomerOrderSummary.objects.get(customer=customer)
+        assert summary.orders_count == 1
+        assert summary.lifetime_spend == Decimal('6.00')
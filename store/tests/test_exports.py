@@ -0,0 +1,71 @@
+import csv
+import json
+from io import StringIO
+from django.core.management import call_command
+from store.exports import pk_ranges
+from store.models import Product
+import pytest
+from model_bakery import baker
+
+
+@pytest.fixture
+def export_data(tmp_path):
+    def do_export_data(*args):
+        path = tmp_path / 'export'
+        call_command('export_data', *args, '--output', str(path), stderr=StringIO())
+        return path.read_text()
+    return do_export_data
+
+
+@pytest.mark.django_db
+class TestExportData:
+
+    def test_if_products_are_exported_as_csv_rows_are_in_id_order(self, export_data):
+        products = baker.make(Product, _quantity=5)
+
+        rows = list(csv.DictReader(StringIO(export_data('product', '--chunk-size', '2'))))
+
+        assert [int(row['id']) for row in rows] == sorted(product.id for product in products)
+        assert rows[0]['unit_price'] == str(min(products, key=lambda p: p.id).unit_price)
+
+    def test_if_orders_are_exported_as_jsonl_each_line_is_a_row(self, export_data):
+        order = baker.make('store.Order', customer=baker.make('core.User').customer)
+
+        lines = export_data('order', '--format', 'jsonl').splitlines()
+
+        assert [json.loads(line)['id'] for line in lines] == [order.id]
+        assert json.loads(lines[0])['customer_id'] == order.customer_id
+
+    def test_if_export_is_split_in_parts_they_cover_every_row_once(self, export_data):
+        products = baker.make(Product, _quantity=7)
+
+        parts = [export_data('product', '--parts', '3', '--part', str(part)) for part in (1, 2, 3)]
+
+        ids = [int(row['id']) for row in csv.DictReader(StringIO(''.join(parts)))]
+        assert ids == sorted(product.id for product in products)
+        assert len(pk_ranges('product', 3)) == 3
+
+    def test_if_admin_exports_selected_products_response_is_streamed(self, admin_client):
+        products = baker.make(Product, _quantity=3)
+
+        response = admin_client.post('/admin/store/product/', {
+            'action': 'export_csv', '_selected_action': [products[0].id, products[2].id]})
+
+        assert response.streaming
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        assert [int(row['id']) for row in rows] == [products[0].id, products[2].id]
+
+    def test_if_nullable_column_is_empty_in_a_chunk_parquet_keeps_one_schema(self, tmp_path):
+        pyarrow = pytest.importorskip('pyarrow')
+        import pyarrow.parquet
+        products = baker.make(Product, description=None, _quantity=2)
+        products += baker.make(Product, description='Fresh', _quantity=2)
+        path = tmp_path / 'products.parquet'
+
+        call_command('export_data', 'product', '--format', 'parquet', '--chunk-size', '2',
+                     '--output', str(path), stderr=StringIO())
+
+        table = pyarrow.parquet.read_table(path)
+        assert table.column('id').to_pylist() == sorted(product.id for product in products)
+        assert table.column('description').to_pylist() == [None, None, 'Fresh', 'Fresh']
+        assert table.schema.field('unit_price').type == pyarrow.decimal128(6, 2)
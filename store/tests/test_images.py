@@ -0,0 +1,69 @@
+import io
+import os
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from store.models import Product, ProductImage
+import pytest
+from rest_framework import status
+from model_bakery import baker
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+def png(color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def upload_image(api_client):
+    def do_upload_image(product, content, name='photo.png'):
+        return api_client.post(
+            f"/store/products/{product.id}/images/",
+            {'image': SimpleUploadedFile(name, content, content_type='image/png')},
+            format='multipart')
+    return do_upload_image
+
+
+@pytest.mark.django_db
+class TestUploadProductImage:
+
+    def test_if_image_is_uploaded_it_is_stored_under_its_content_hash(self, upload_image, media_root):
+        product = baker.make(Product)
+
+        response = upload_image(product, png())
+
+        assert response.status_code == status.HTTP_201_CREATED
+        name = ProductImage.objects.get().image.name
+        assert (media_root / name).read_bytes() == png()
+        assert os.listdir(media_root / '.incoming') == []
+
+    def test_if_same_image_is_uploaded_twice_it_is_stored_once(self, upload_image, media_root):
+        first, second = baker.make(Product, _quantity=2)
+
+        upload_image(first, png(), 'a.png')
+        upload_image(second, png(), 'b.png')
+        upload_image(second, png('blue'), 'c.png')
+
+        names = [image.image.name for image in ProductImage.objects.order_by('id')]
+        assert names[0] == names[1] != names[2]
+        assert len(list((media_root / 'store' / 'images').rglob('*.png'))) == 2
+
+    def test_if_image_is_too_large_returns_400_without_storing_it(self, upload_image, media_root):
+        product = baker.make(Product)
+
+        response = upload_image(product, os.urandom(1024 * 1024))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'cannot exceed' in response.data['image'][0]
+        assert not ProductImage.objects.exists()
+        assert os.listdir(media_root / '.incoming') == []
+
+        # The rest of the body is drained instead of the connection being
+        # reset, so a real client gets to read this response
+        assert len(response.wsgi_request.environ['wsgi.input']) == 0
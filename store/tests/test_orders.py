@@ -0,0 +1,230 @@
+import datetime
+import json
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from store.cache import customer_id_key, get_customer_id
+from store.models import Cart, CartItem, Order, OrderEvent, Product
+from store.outbox import claim_pending, dispatch_pending
+from store.renderers import FastJSONRenderer
+from store.signals import order_created
+from store.tasks import dispatch_order_events
+import pytest
+from rest_framework import status
+from model_bakery import baker
+
+
+@pytest.fixture
+def checkout(api_client):
+    def do_checkout(cart_id):
+        return api_client.post("/store/orders/", {"cart_id": cart_id})
+    return do_checkout
+
+
+@pytest.fixture
+def authenticate_customer(api_client):
+    def do_authenticate_customer():
+        user = baker.make('core.User', is_staff=True)
+        api_client.force_authenticate(user=user)
+        return user.customer
+    return do_authenticate_customer
+
+
+@pytest.mark.django_db
+class TestCreateOrder:
+
+    def test_if_cart_is_checked_out_inventory_is_reserved(self, checkout, authenticate_customer):
+        authenticate_customer()
+        cart = baker.make(Cart)
+        first = baker.make(Product, inventory=10)
+        second = baker.make(Product, inventory=3)
+        baker.make(CartItem, cart=cart, product=first, quantity=4)
+        baker.make(CartItem, cart=cart, product=second, quantity=3)
+
+        response = checkout(cart.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted((item['product']['id'], item['quantity']) for item in response.data['items']) == \
+            sorted([(first.id, 4), (second.id, 3)])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert (first.inventory, second.inventory) == (6, 0)
+        assert not Cart.objects.filter(id=cart.id).exists()
+        assert not CartItem.objects.filter(cart_id=cart.id).exists()
+
+    def test_if_product_is_oversold_order_is_rejected(self, checkout, authenticate_customer):
+        authenticate_customer()
+        cart = baker.make(Cart)
+        first = baker.make(Product, inventory=10)
+        second = baker.make(Product, inventory=2)
+        baker.make(CartItem, cart=cart, product=first, quantity=4)
+        baker.make(CartItem, cart=cart, product=second, quantity=3)
+
+        response = checkout(cart.id)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['cart_id'] is not None
+        first.refresh_from_db()
+        assert first.inventory == 10
+        assert not Order.objects.exists()
+        assert CartItem.objects.filter(cart_id=cart.id).count() == 2
+
+
+@pytest.fixture
+def order_event():
+    def do_order_event():
+        customer = baker.make('core.User').customer
+        return baker.make(OrderEvent, order=baker.make(Order, customer=customer), event=OrderEvent.EVENT_ORDER_CREATED)
+    return do_order_event
+
+
+@pytest.fixture
+def receiver():
+    calls = []
+
+    def on_order_created(sender, **kwargs):
+        calls.append(kwargs['order'].id)
+        if receiver.fail:
+            raise RuntimeError("receiver is down")
+
+    receiver.fail = False
+    receiver.calls = calls
+    order_created.connect(on_order_created)
+    yield receiver
+    order_created.disconnect(on_order_created)
+
+
+@pytest.mark.django_db
+class TestOrderEvents:
+
+    def test_if_order_is_placed_event_is_published_after_commit(self, checkout, authenticate_customer,
+                                                                 django_capture_on_commit_callbacks, receiver):
+        authenticate_customer()
+        cart = baker.make(Cart)
+        baker.make(CartItem, cart=cart, product=baker.make(Product, inventory=5), quantity=1)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = checkout(cart.id)
+
+        assert receiver.calls == []
+        assert dispatch_order_events.delay in callbacks
+        assert OrderEvent.objects.get().order_id == response.data['id']
+
+    def test_if_broker_is_down_order_is_still_placed(self, checkout, authenticate_customer,
+                                                     django_capture_on_commit_callbacks, monkeypatch):
+        def broker_down():
+            raise ConnectionError("broker is down")
+        monkeypatch.setattr(dispatch_order_events, 'delay', broker_down)
+        authenticate_customer()
+        cart = baker.make(Cart)
+        baker.make(CartItem, cart=cart, product=baker.make(Product, inventory=5), quantity=1)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = checkout(cart.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert OrderEvent.objects.get().dispatched_at is None
+
+    def test_if_receivers_succeed_event_is_marked_dispatched(self, order_event, receiver):
+        event = order_event()
+
+        assert dispatch_pending() == (1, 0, False)
+
+        event.refresh_from_db()
+        assert receiver.calls == [event.order_id]
+        assert event.dispatched_at is not None
+        assert dispatch_pending() == (0, 0, False)
+
+    def test_if_receiver_fails_event_stays_pending(self, order_event, receiver):
+        receiver.fail = True
+        event = order_event()
+
+        assert dispatch_pending() == (0, 1, False)
+
+        event.refresh_from_db()
+        assert event.dispatched_at is None
+        assert event.attempts == 1
+        assert "receiver is down" in event.last_error
+
+    def test_if_receiver_failed_event_is_retried_only_after_backoff(self, order_event, receiver):
+        receiver.fail = True
+        event = order_event()
+        dispatch_pending()
+        receiver.fail = False
+
+        assert dispatch_pending() == (0, 0, False)
+
+        OrderEvent.objects.filter(id=event.id).update(next_attempt_at=timezone.now())
+        assert dispatch_pending() == (1, 0, False)
+        assert receiver.calls == [event.order_id, event.order_id]
+
+    def test_if_event_is_claimed_other_workers_skip_it(self, order_event, receiver):
+        order_event()
+
+        events, has_more = claim_pending(batch_size=10)
+
+        assert len(events) == 1
+        assert dispatch_pending() == (0, 0, False)
+        assert receiver.calls == []
+
+
+@pytest.mark.django_db
+class TestStreamOrders:
+
+    def test_if_stream_is_requested_all_orders_are_returned_in_chunks(self, api_client, authenticate_customer, settings):
+        settings.STORE_STREAM_CHUNK_SIZE = 2
+        customer = authenticate_customer()
+        orders = baker.make(Order, customer=customer, _quantity=5)
+        for order in orders:
+            baker.make('store.OrderItem', order=order, unit_price=Decimal('9.99'), quantity=1)
+
+        response = api_client.get("/store/orders/", {"stream": "true"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        with CaptureQueriesContext(connection) as queries:
+            rows = json.loads(b''.join(response.streaming_content))
+        assert [row['id'] for row in rows] == sorted(order.id for order in orders)
+        assert rows[0]['items'][0]['unit_price'] == 9.99
+        # one keyset query per chunk, no result set held client side
+        chunks = [query['sql'] for query in queries if query['sql'].startswith('SELECT "store_order"."id"')]
+        assert len(chunks) == 3
+        assert all('LIMIT 2' in sql for sql in chunks)
+
+    def test_if_fast_renderer_is_used_output_matches_json_renderer(self):
+        data = {'price': Decimal('1.50'), 'at': datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+                'text': 'line\u2028break', 'items': [1, None, 'é']}
+
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+class TestListOrders:
+
+    def test_if_customer_lists_orders_query_count_does_not_grow_with_orders(
+            self, api_client, django_assert_num_queries):
+        user = baker.make('core.User')
+        api_client.force_authenticate(user=user)
+        api_client.get("/store/orders/")  # caches the customer id
+        orders = baker.make(Order, customer=user.customer, _quantity=5)
+        for order in orders:
+            baker.make('store.OrderItem', order=order, unit_price=Decimal('1.00'), quantity=1, _quantity=2)
+
+        # count, page of orders, items with their products
+        with django_assert_num_queries(3):
+            response = api_client.get("/store/orders/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 5
+        assert len(response.data['results'][0]['items']) == 2
+
+    def test_if_customer_is_deleted_cached_customer_id_is_cleared(self):
+        user = baker.make('core.User')
+        cache.set(customer_id_key(user.id), -1)
+
+        user.customer.delete()
+
+        assert get_customer_id(user.id) is None
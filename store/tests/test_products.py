@@ -0,0 +1,268 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from store.models import Collection, Product, ProductImage
+from store.search import get_search_engine
+from store.serializers import ProductSerializer
+from store.tax import refresh_prices_with_tax
+from tags.models import Tag, TaggedItem
+import pytest
+from rest_framework import status
+from model_bakery import baker
+
+
+@pytest.fixture
+def list_products(api_client):
+    def do_list_products(params=None):
+        return api_client.get("/store/products/", params or {})
+    return do_list_products
+
+
+@pytest.mark.django_db
+class TestListProducts:
+
+    def test_if_cursor_walks_all_pages_in_title_order(self, list_products, api_client):
+        collection = baker.make(Collection)
+        products = [baker.make(Product, title=f"product {i:02}", collection=collection) for i in range(7)]
+
+        titles = []
+        response = list_products({"limit": 3})
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            titles += [product['title'] for product in response.data['results']]
+            if response.data['next'] is None:
+                break
+            response = api_client.get(response.data['next'])
+
+        assert titles == sorted(product.title for product in products)
+
+    def test_if_previous_cursor_returns_previous_page(self, list_products, api_client):
+        collection = baker.make(Collection)
+        for price in range(1, 8):
+            baker.make(Product, unit_price=Decimal(price), collection=collection)
+
+        first = list_products({"limit": 3, "ordering": "-unit_price"})
+        second = api_client.get(first.data['next'])
+        previous = api_client.get(second.data['previous'])
+
+        assert [p['unit_price'] for p in second.data['results']] == [4, 3, 2]
+        assert previous.data['results'] == first.data['results']
+        assert previous.data['previous'] is None
+
+    def test_if_count_is_opted_out_it_is_omitted(self, list_products):
+        baker.make(Product, _quantity=2)
+
+        response = list_products({"count": "false"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'count' not in response.data
+        assert len(response.data['results']) == 2
+
+    def test_if_offset_is_given_limit_offset_is_used(self, list_products):
+        baker.make(Product, _quantity=3)
+
+        response = list_products({"limit": 1, "offset": 1})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 3
+        assert 'offset=2' in response.data['next']
+
+    def test_if_cursor_is_invalid_returns_404(self, list_products):
+        response = list_products({"cursor": "not-a-cursor"})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.fixture
+def search_index():
+    engine = get_search_engine()
+    engine.reset()
+    yield engine
+    engine.reset()
+
+
+@pytest.mark.django_db
+class TestSearchProducts:
+
+    def test_if_title_match_ranks_above_description_match(self, list_products, search_index):
+        baker.make(Product, title="Plain mug", description="A coffee cup")
+        baker.make(Product, title="Coffee beans", description="Dark roast")
+        baker.make(Product, title="Tea", description="Green")
+
+        response = list_products({"search": "coffee"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [p['title'] for p in response.data['results']] == ["Coffee beans", "Plain mug"]
+
+    def test_if_product_is_saved_index_is_updated(self, list_products, search_index):
+        product = baker.make(Product, title="Coffee beans")
+        list_products({"search": "coffee"})
+
+        product.title = "Tea leaves"
+        product.save()
+        response = list_products({"search": "coffee"})
+
+        assert response.data['results'] == []
+        assert list_products({"search": "tea"}).data['results'][0]['id'] == product.id
+
+
+@pytest.mark.django_db
+class TestProductCache:
+
+    def test_if_product_changes_cached_detail_is_invalidated(self, api_client):
+        product = baker.make(Product, title="Old title")
+        api_client.get(f"/store/products/{product.id}/")
+
+        product.title = "New title"
+        product.save()
+        response = api_client.get(f"/store/products/{product.id}/")
+
+        assert response.data['title'] == "New title"
+
+    def test_if_product_moves_both_collection_lists_are_invalidated(self, list_products):
+        source, target = baker.make(Collection, _quantity=2)
+        product = baker.make(Product, collection=source)
+        list_products({"collection_id": source.id})
+        list_products({"collection_id": target.id})
+
+        product.collection = target
+        product.save()
+
+        assert list_products({"collection_id": source.id}).data['results'] == []
+        assert list_products({"collection_id": target.id}).data['results'][0]['id'] == product.id
+
+    def test_if_admin_gets_cache_stats_returns_hits_and_misses(self, list_products, api_client, authenticate):
+        baker.make(Product)
+        list_products()
+        list_products()
+        authenticate(is_staff=True)
+
+        response = api_client.get("/store/products/cache_stats/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['hits'] == 1
+        assert response.data['misses'] == 1
+
+
+@pytest.mark.django_db
+class TestPriceWithTax:
+
+    def test_if_product_is_saved_price_with_tax_uses_collection_rate(self, api_client):
+        collection = baker.make(Collection, tax_rate=Decimal('0.05'))
+        product = baker.make(Product, collection=collection, unit_price=Decimal('10.01'))
+
+        response = api_client.get(f"/store/products/{product.id}/")
+
+        assert response.data['price_with_tax'] == Decimal('10.51')
+
+    def test_if_tax_rate_changes_prices_and_cache_are_refreshed(self, list_products):
+        collection = baker.make(Collection, tax_rate=Decimal('0.10'))
+        product = baker.make(Product, collection=collection, unit_price=Decimal('20.00'))
+        assert list_products().data['results'][0]['price_with_tax'] == Decimal('22.00')
+
+        collection.tax_rate = Decimal('0.25')
+        collection.save()
+
+        product.refresh_from_db()
+        assert product.price_with_tax == Decimal('25.00')
+        assert list_products().data['results'][0]['price_with_tax'] == Decimal('25.00')
+
+    def test_if_all_prices_are_refreshed_cached_details_and_collection_lists_are_invalidated(
+            self, api_client, list_products):
+        collection = baker.make(Collection, tax_rate=Decimal('0.10'))
+        product = baker.make(Product, collection=collection, unit_price=Decimal('20.00'))
+        api_client.get(f"/store/products/{product.id}/")
+        list_products({'collection_id': collection.id})
+        # a change that skips the signal handlers, e.g. a bulk update
+        Collection.objects.filter(id=collection.id).update(tax_rate=Decimal('0.50'))
+
+        refresh_prices_with_tax()
+
+        assert api_client.get(f"/store/products/{product.id}/").data['price_with_tax'] == Decimal('30.00')
+        response = list_products({'collection_id': collection.id})
+        assert response.data['results'][0]['price_with_tax'] == Decimal('30.00')
+
+
+@pytest.mark.django_db
+class TestProductReadSerializer:
+
+    def test_if_products_are_listed_response_matches_product_serializer(self, list_products):
+        products = baker.make(Product, description=None, _quantity=3)
+        baker.make(ProductImage, product=products[0], image='store/images/a.jpg')
+        baker.make(ProductImage, product=products[0], image='store/images/b.jpg')
+
+        response = list_products()
+
+        expected = ProductSerializer(
+            Product.objects.order_by('title', 'id'), many=True, context={'request': response.wsgi_request}).data
+        assert response.data['results'] == expected
+
+    def test_if_benchmark_runs_outputs_match(self):
+        baker.make(Product, _quantity=5)
+        out = StringIO()
+
+        call_command('benchmark_product_list', '--rounds', '1', stdout=out)
+
+        assert 'Same output' in out.getvalue()
+
+
+@pytest.fixture
+def tag_product():
+    def do_tag_product(product, label):
+        return TaggedItem.objects.create(tag=baker.make(Tag, label=label), content_object=product)
+    return do_tag_product
+
+
+@pytest.mark.django_db
+class TestProductTags:
+
+    def test_if_products_are_tagged_list_loads_tags_in_one_query(
+            self, list_products, tag_product, django_assert_num_queries):
+        products = baker.make(Product, _quantity=5)
+        for product in products:
+            tag_product(product, f'tag {product.id}')
+        list_products()  # warms the ContentType cache
+        cache.clear()
+
+        # Pagination count and page, images, tags
+        with django_assert_num_queries(4):
+            response = list_products()
+
+        assert [row['tags'] for row in response.data['results']] == [
+            [f'tag {product.id}'] for product in sorted(products, key=lambda p: (p.title, p.id))]
+
+    def test_if_product_is_tagged_cached_detail_is_invalidated(self, api_client, tag_product):
+        product = baker.make(Product)
+        api_client.get(f"/store/products/{product.id}/")
+
+        tag_product(product, 'fresh')
+        response = api_client.get(f"/store/products/{product.id}/")
+
+        assert response.data['tags'] == ['fresh']
+
+    def test_if_tag_is_renamed_cached_responses_are_invalidated(self, api_client, list_products, tag_product):
+        product = baker.make(Product)
+        tag_product(product, 'fresh')
+        api_client.get(f"/store/products/{product.id}/")
+        list_products({'collection_id': product.collection_id})
+
+        tag = Tag.objects.get(label='fresh')
+        tag.label = 'organic'
+        tag.save()
+
+        assert api_client.get(f"/store/products/{product.id}/").data['tags'] == ['organic']
+        response = list_products({'collection_id': product.collection_id})
+        assert response.data['results'][0]['tags'] == ['organic']
+
+    def test_if_tags_of_mixed_models_are_loaded_each_object_gets_its_own(self, tag_product):
+        product = baker.make(Product)
+        collection = baker.make(Collection, id=product.id)
+        tag_product(product, 'product tag')
+        tag_product(collection, 'collection tag')
+
+        tags = TaggedItem.objects.get_tags_for_objects([product, collection, baker.make(Product)])
+
+        assert [tag.label for tag in tags[(Product, product.id)]] == ['product tag']
+        assert [tag.label for tag in tags[(Collection, collection.id)]] == ['collection tag']
+        assert len(tags) == 3
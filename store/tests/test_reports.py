@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from store.models import Collection, Order, OrderItem, Product, SalesBucket
+from store.reporting import refresh_sales_buckets
+import pytest
+from rest_framework import status
+from model_bakery import baker
+
+
+@pytest.fixture
+def place_order():
+    customer = baker.make('core.User').customer
+
+    def do_place_order(placed_at, *lines, payment_status=Order.PAYMENT_STATUS_COMPLETE):
+        order = baker.make(Order, customer=customer, payment_status=payment_status)
+        # auto_now_add ignores values passed on create
+        Order.objects.filter(pk=order.pk).update(placed_at=placed_at)
+        order.refresh_from_db()
+        for product, quantity, unit_price in lines:
+            baker.make(OrderItem, order=order, product=product, quantity=quantity, unit_price=Decimal(unit_price))
+        return order
+    return do_place_order
+
+
+def bucket(dimension, granularity, object_id, bucket_start):
+    return SalesBucket.objects.get(
+        dimension=dimension, granularity=granularity, object_id=object_id, bucket_start=bucket_start)
+
+
+@pytest.mark.django_db
+class TestSalesBuckets:
+
+    def test_if_orders_are_folded_buckets_hold_hourly_and_daily_totals(self, place_order):
+        collection = baker.make(Collection)
+        tea, coffee = baker.make(Product, collection=collection, _quantity=2)
+        place_order(datetime(2024, 5, 1, 9, 15, tzinfo=timezone.utc), (tea, 2, '3.00'), (coffee, 1, '5.00'))
+        place_order(datetime(2024, 5, 1, 10, 5, tzinfo=timezone.utc), (tea, 1, '3.00'))
+
+        refresh_sales_buckets(settle_seconds=0)
+
+        nine = bucket('product', 'hour', tea.id, datetime(2024, 5, 1, 9, tzinfo=timezone.utc))
+        assert (nine.revenue, nine.units, nine.orders_count) == (Decimal('6.00'), 2, 1)
+        day = bucket('collection', 'day', collection.id, datetime(2024, 5, 1, tzinfo=timezone.utc))
+        assert (day.revenue, day.units, day.orders_count) == (Decimal('14.00'), 4, 2)
+
+    def test_if_refreshed_in_batches_only_new_orders_are_added(self, place_order):
+        product = baker.make(Product)
+        placed_at = datetime(2024, 5, 1, 9, tzinfo=timezone.utc)
+        place_order(placed_at, (product, 1, '2.00'))
+        place_order(placed_at, (product, 1, '2.00'))
+
+        assert refresh_sales_buckets(batch_size=1, settle_seconds=0)['has_more']
+        refresh_sales_buckets(batch_size=1, settle_seconds=0)
+        refresh_sales_buckets(batch_size=1, settle_seconds=0)
+        place_order(placed_at, (product, 3, '2.00'))
+        call_command('refresh_sales_buckets', '--settle-seconds', '0', stdout=StringIO())
+
+        day = bucket('product', 'day', product.id, datetime(2024, 5, 1, tzinfo=timezone.utc))
+        assert (day.revenue, day.units, day.orders_count) == (Decimal('10.00'), 5, 3)
+
+    def test_if_order_is_not_paid_it_is_not_counted(self, place_order):
+        product = baker.make(Product)
+        placed_at = datetime(2024, 5, 1, 9, tzinfo=timezone.utc)
+        place_order(placed_at, (product, 1, '2.00'))
+        place_order(placed_at, (product, 5, '2.00'), payment_status=Order.PAYMENT_STATUS_PENDING)
+        place_order(placed_at, (product, 7, '2.00'), payment_status=Order.PAYMENT_STATUS_FAILED)
+
+        refresh_sales_buckets(settle_seconds=0)
+
+        day = bucket('product', 'day', product.id, datetime(2024, 5, 1, tzinfo=timezone.utc))
+        assert (day.revenue, day.units, day.orders_count) == (Decimal('2.00'), 1, 1)
+
+    def test_if_folded_order_is_paid_or_refunded_buckets_follow(self, place_order):
+        product = baker.make(Product)
+        placed_at = datetime(2024, 5, 1, 9, tzinfo=timezone.utc)
+        place_order(placed_at, (product, 1, '2.00'))
+        order = place_order(placed_at, (product, 3, '2.00'), payment_status=Order.PAYMENT_STATUS_PENDING)
+        refresh_sales_buckets(settle_seconds=0)
+
+        order.payment_status = Order.PAYMENT_STATUS_COMPLETE
+        order.save()
+        day = bucket('product', 'day', product.id, datetime(2024, 5, 1, tzinfo=timezone.utc))
+        assert (day.revenue, day.units, day.orders_count) == (Decimal('8.00'), 4, 2)
+
+        order.payment_status = Order.PAYMENT_STATUS_FAILED
+        order.save()
+        day.refresh_from_db()
+        assert (day.revenue, day.units, day.orders_count) == (Decimal('2.00'), 1, 1)
+
+    def test_if_order_is_not_settled_it_is_not_folded(self, place_order):
+        place_order(datetime.now(timezone.utc), (baker.make(Product), 1, '2.00'))
+
+        assert refresh_sales_buckets(settle_seconds=60)['orders'] == 0
+
+
+@pytest.mark.django_db
+class TestSalesReportApi:
+
+    def test_if_user_is_not_admin_returns_403(self, api_client, authenticate):
+        authenticate()
+
+        response = api_client.get("/store/reports/sales/")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_if_admin_queries_range_returns_buckets_in_range(self, api_client, authenticate, place_order):
+        product = baker.make(Product)
+        place_order(datetime(2024, 5, 1, 9, tzinfo=timezone.utc), (product, 1, '2.00'))
+        place_order(datetime(2024, 5, 3, 9, tzinfo=timezone.utc), (product, 1, '2.00'))
+        refresh_sales_buckets(settle_seconds=0)
+        authenticate(is_staff=True)
+
+        response = api_client.get("/store/reports/sales/", {
+            'dimension': 'product', 'granularity': 'day', 'object_id': product.id,
+            'bucket_start__gte': '2024-05-02T00:00:00Z', 'bucket_start__lt': '2024-05-04T00:00:00Z',
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['bucket_start'] for row in response.data['results']] == ['2024-05-03T00:00:00Z']
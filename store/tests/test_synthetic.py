@@ -0,0 +1,49 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from store.models import Order, OrderItem, Product
+from store.synthetic import SyntheticData
+
+SIZES = dict(collections=3, products=50, customers=10, carts=5, orders=20)
+
+
+def snapshot():
+    return (
+        list(Product.objects.order_by('id').values_list('id', 'title', 'unit_price', 'inventory')),
+        list(OrderItem.objects.order_by('id').values_list('order_id', 'product_id', 'quantity', 'unit_price')),
+    )
+
+
+@pytest.mark.django_db
+class TestSyntheticData:
+
+    def test_if_seed_is_same_data_is_same(self):
+        SyntheticData(seed=7).generate(**SIZES)
+        first = snapshot()
+        for model in (OrderItem, Order, Product):
+            model.objects.all().delete()
+
+        SyntheticData(seed=7).generate(**SIZES)
+
+        # ids keep counting up, so compare everything relative to the first row
+        second = snapshot()
+        assert [row[1:] for row in first[0]] == [row[1:] for row in second[0]]
+        assert [row[2:] for row in first[1]] == [row[2:] for row in second[1]]
+
+    def test_if_data_is_generated_derived_columns_are_set(self):
+        SyntheticData(seed=1).generate(**SIZES)
+
+        assert Product.objects.count() == 50
+        assert not Product.objects.filter(price_with_tax__isnull=True).exists()
+        assert not OrderItem.objects.filter(unit_price__isnull=True).exists()
+
+    def test_command_prints_counts(self):
+        out = StringIO()
+
+        call_command('generate_data', '--products=20', '--collections=2', '--customers=5',
+                     '--carts=2', '--orders=5', stdout=out)
+
+        assert Product.objects.count() == 20
+        assert '20 products' in out.getvalue()
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+from .validators import MAX_FILE_SIZE_KB
+
+
+def incoming_dir():
+    # Inside MEDIA_ROOT, so storing an upload is a rename on the same filesystem
+    path = getattr(settings, 'PRODUCT_IMAGE_INCOMING_DIR', os.path.join(settings.MEDIA_ROOT, '.incoming'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class HashedUploadedFile(UploadedFile):
+    """An upload written to a temporary file in MEDIA_ROOT, with the SHA-256 of its content."""
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        _, ext = os.path.splitext(name)
+        file = tempfile.NamedTemporaryFile(suffix='.upload' + ext, dir=incoming_dir())
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.sha256 = hashlib.sha256()
+
+    def temporary_file_path(self):
+        # FileSystemStorage moves files that have one instead of copying them
+        return self.file.name
+
+    @property
+    def content_hash(self):
+        return self.sha256.hexdigest()
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # Moved into storage, nothing left to delete
+            pass
+
+
+class ProductImageUploadHandler(FileUploadHandler):
+    """
+    Streams uploaded files to disk chunk by chunk, hashing them as they
+    arrive, and stops the upload as soon as a file grows past
+    MAX_FILE_SIZE_KB. The rest of the body is read and discarded rather
+    than the connection reset, so the client gets the view's 400 for
+    `request.upload_too_large`.
+    """
+
+    def __init__(self, request=None, max_size=MAX_FILE_SIZE_KB * 1024):
+        super().__init__(request)
+        self.max_size = max_size
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.size = 0
+        self.file = HashedUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.file.close()
+            self.request.upload_too_large = True
+            raise StopUpload()
+        self.file.sha256.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+
+
+def store_upload(upload, upload_to):
+    """
+    Saves an upload under a name derived from its content and returns the
+    name. A file that is already stored is reused instead of written again.
+    """
+    content_hash = getattr(upload, 'content_hash', None)
+    if content_hash is None:
+        content_hash = hashlib.sha256()
+        for chunk in upload.chunks():
+            content_hash.update(chunk)
+        content_hash = content_hash.hexdigest()
+
+    _, ext = os.path.splitext(upload.name)
+    name = f'{upload_to}/{content_hash[:2]}/{content_hash}{ext.lower()}'
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, upload)
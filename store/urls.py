@@ -18,6 +18,7 @@ cart_router = routers.NestedDefaultRouter(router, 'carts', lookup='cart')
 cart_router.register('items', views.CartItemViewSet, basename='cart-items')
 router.register('customers', views.CustomerViewSet, basename='customers')
 router.register('orders', views.OrderViewSet, basename='orders')
+router.register('reports/sales', views.SalesReportViewSet, basename='sales-report')
 
 
 urlpatterns = router.urls + products_router.urls + cart_router.urls
@@ -1,7 +1,10 @@
 from django.core.exceptions import ValidationError
 
+MAX_FILE_SIZE_KB = 200
+
+
 def validate_file_size(file):
-    max_size_kb = 200
+    max_size_kb = MAX_FILE_SIZE_KB
 
     if file.size > max_size_kb * 1024:
-        raise ValidationError(f'File size cannot exceed {max_size_kb}KB!')
\ No newline at end of file
+        raise ValidationError(f'File size cannot exceed {max_size_kb}KB!')
@@ -1,37 +1,43 @@
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Prefetch, prefetch_related_objects
 from django.db.models.aggregates import Count
 
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, DjangoModelPermissions, DjangoModelPermissionsOrAnonReadOnly, IsAdminUser, IsAuthenticated
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.mixins import ListModelMixin, CreateModelMixin, RetrieveModelMixin,DestroyModelMixin, UpdateModelMixin
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
-from rest_framework.viewsets import ModelViewSet,GenericViewSet
+from rest_framework.viewsets import ModelViewSet,GenericViewSet,ReadOnlyModelViewSet
 from rest_framework.pagination import PageNumberPagination
 
 from store.permissions import FullDjangoModelPermissions, IsAdminOrReadOnly, ViewHistoryPermission
 
 
-from .pagination import DefaultPagination
-from .filters import ProductFilterSet
-from .models import Cart, CartItem, Customer, Order, OrderItem, Product,Collection, ProductImage, Review
-from .serializers import AddCartItemSerializer, CartItemSerializer, CartSerializer, CollectionSerializer, CreateOrderSerialzer, CustomerSerializer, ProductImageSerializer, ProductSerializer, ReviewSerializer, UpdateCartItemSerializer, OrderSerializer, UpdateOrderSerializer
+from .cache import get_customer_id, product_cache
+from .pagination import DefaultPagination, KeysetPagination
+from .renderers import StreamingListMixin
+from .uploads import ProductImageUploadHandler
+from .validators import MAX_FILE_SIZE_KB
+from .filters import ProductFilterSet, ProductSearchFilter, SalesBucketFilterSet
+from .models import Cart, CartItem, Customer, CustomerOrderSummary, Order, OrderItem, Product,Collection, ProductImage, Review, SalesBucket
+from .serializers import AddCartItemSerializer, AddCartItemsSerializer, CartItemSerializer, CartReadSerializer, CartSerializer, CollectionSerializer, CreateOrderSerialzer, CustomerOrderSummarySerializer, CustomerSerializer, ProductImageSerializer, ProductReadSerializer, ProductSerializer, ReviewSerializer, SalesBucketSerializer, UpdateCartItemSerializer, OrderSerializer, UpdateOrderSerializer
 
 
 class ProductViewSet(ModelViewSet):
     # queryset = Product.objects.prefetch_related('images').all()
     serializer_class = ProductSerializer
     # permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
     filterset_class = ProductFilterSet
-    pagination_class = DefaultPagination
+    pagination_class = KeysetPagination
     search_fields = ['title','description']
-    ordering_filelds = ['unit_price','last_update']
+    ordering_fields = ['unit_price','last_update']
 
     def get_queryset(self):
         queryset = Product.objects.prefetch_related('images').all()
@@ -44,6 +50,29 @@ class ProductViewSet(ModelViewSet):
     def get_serializer_context(self):
         return {'request':self.request}
 
+    def list(self, request, *args, **kwargs):
+        return product_cache.read_through(product_cache.list_key(request), self.list_rows)
+
+    def list_rows(self):
+        # Same response as ModelViewSet.list, serialized from values rows
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        # Annotations such as search_rank stay selected for the keyset cursor
+        queryset = queryset.values(*ProductReadSerializer.row_fields, *queryset.query.annotations)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ProductReadSerializer(page, self.get_serializer_context()).data)
+        return Response(ProductReadSerializer(queryset, self.get_serializer_context()).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        return product_cache.read_through(
+            product_cache.detail_key(kwargs['pk']),
+            lambda: super(ProductViewSet, self).retrieve(request, *args, **kwargs))
+
+    @action(detail=False, methods=['GET'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        return Response(product_cache.stats())
+
     def destroy(self, request, *args, **kwargs):
         if OrderItem.objects.filter(product_id=kwargs['pk']).count() > 0:
             return Response( {"error":"Product cannot be deleted as it is associated with order item"} ,status=status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -55,6 +84,8 @@ class CartItemViewSet(ModelViewSet):
     http_method_names = ['get','post','patch','delete']
 
     def get_serializer_class(self):
+        if self.action == 'batch':
+            return AddCartItemsSerializer
         if self.request.method == 'POST':
             return AddCartItemSerializer
         elif self.request.method == 'PATCH':
@@ -67,6 +98,13 @@ class CartItemViewSet(ModelViewSet):
     def get_queryset(self):
         return CartItem.objects.select_related('product').filter(cart__id=self.kwargs['cart_pk'])
 
+    @action(detail=False, methods=['POST'])
+    def batch(self, request, cart_pk):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.save()
+        return Response(AddCartItemSerializer(items, many=True).data, status=status.HTTP_201_CREATED)
+
 
 class CartViewSet(CreateModelMixin,RetrieveModelMixin,DestroyModelMixin,GenericViewSet):
     serializer_class = CartSerializer
@@ -75,11 +113,18 @@ class CartViewSet(CreateModelMixin,RetrieveModelMixin,DestroyModelMixin,GenericV
         return {'reques':self.request }
     
     def get_queryset(self):
+        if self.action == 'retrieve':
+            return Cart.objects.with_total_price().filter(id=self.kwargs['pk'])
         return Cart.objects.prefetch_related('items__product').filter(id=self.kwargs['pk'])
 
+    def retrieve(self, request, *args, **kwargs):
+        cart = self.get_object()
+        cart['items'] = CartItem.objects.rows_for(cart['id'])
+        return Response(CartReadSerializer(cart).data)
+
 
 class CollectionViewSet(ModelViewSet):
-    queryset = Collection.objects.select_related('featured_product').annotate(products_count=Count('products')).all() 
+    queryset = Collection.objects.select_related('featured_product').all()
     serializer_class = CollectionSerializer
     permission_classes = [IsAdminOrReadOnly]
 
@@ -102,14 +147,17 @@ class ReviewViewSet(ModelViewSet):
     def get_queryset(self):
         return Review.objects.select_related('products').filter(product_id=self.kwargs['product_pk'])
 
-class CustomerViewSet(ModelViewSet):
+class CustomerViewSet(StreamingListMixin, ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [IsAdminUser]
 
     @action(detail=True, methods=["GET"], permission_classes=[ViewHistoryPermission])
     def history(self, request,pk):
-        return Response("ok")
+        customer = get_object_or_404(Customer.objects.only('id'), pk=pk)
+        summary = (CustomerOrderSummary.objects.filter(customer_id=customer.id).first()
+                   or CustomerOrderSummary(customer_id=customer.id))
+        return Response(CustomerOrderSummarySerializer(summary).data)
 
     @action(detail=False,methods=['GET','PUT'], permission_classes=[IsAuthenticated])
     def me(self, request):
@@ -124,7 +172,7 @@ class CustomerViewSet(ModelViewSet):
             return Response(serializer.data)
 
 
-class OrderViewSet(ModelViewSet):
+class OrderViewSet(StreamingListMixin, ModelViewSet):
     serializer_class = OrderSerializer
     http_method_names = ['get','patch', 'post', 'delete', 'head', 'options']
 
@@ -135,12 +183,14 @@ class OrderViewSet(ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        # Items and their products in one extra query for the whole page
+        queryset = Order.objects.prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('product'))).order_by('id')
         if user.is_staff:
-            return  Order.objects.all()
-        
-        customer_id = Customer.objects.only('id').get(user_id=user.id)
+            return queryset
+
         # (customer_id, created) = Customer.objects.only('id').get_or_create(user_id=user.id)  # Wrong way if used get_or_create
-        return Order.objects.filter(customer_id=customer_id)
+        return queryset.filter(customer_id=get_customer_id(user.id))
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -153,6 +203,7 @@ class OrderViewSet(ModelViewSet):
         serializer = CreateOrderSerialzer(data=self.request.data, context = {'user_id':self.request.user.id})
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
+        prefetch_related_objects([order], Prefetch('items', queryset=OrderItem.objects.select_related('product')))
 
         serializer = OrderSerializer(order)
         return Response(serializer.data) 
@@ -165,9 +216,40 @@ class OrderViewSet(ModelViewSet):
     #     return Order.objects.select_related('orderitem_set').filter()
 
 
+class SalesReportViewSet(ReadOnlyModelViewSet):
+    """
+    Precomputed sales buckets, e.g.
+    ?dimension=product&granularity=day&object_id=1&bucket_start__gte=2024-01-01&bucket_start__lt=2024-02-01
+    """
+    queryset = SalesBucket.objects.order_by('bucket_start', 'id')
+    serializer_class = SalesBucketSerializer
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = SalesBucketFilterSet
+    pagination_class = DefaultPagination
+
+
 class ProductImageViewSet(ModelViewSet):
     serializer_class = ProductImageSerializer
 
+    def initialize_request(self, request, *args, **kwargs):
+        # Before DRF's parsers read the body
+        request.upload_handlers = [ProductImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        self.check_upload_size(request)
+        return super().create(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        self.check_upload_size(request)
+        return super().update(request, *args, **kwargs)
+
+    def check_upload_size(self, request):
+        request.data  # parses the body through the upload handler
+        if getattr(request._request, 'upload_too_large', False):
+            raise ValidationError({'image': [f'File size cannot exceed {MAX_FILE_SIZE_KB}KB!']})
+
     def get_queryset(self):
         return ProductImage.objects.filter(product_id=self.kwargs['product_pk'])
     
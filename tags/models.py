@@ -1,4 +1,7 @@
+from collections import defaultdict
+
 from django.db import models
+from django.db.models import Q
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 
@@ -10,6 +13,38 @@ class TaggedItemManager(models.Manager):
 
         return TaggedItem.objects.select_related('tag').filter(content_type=content_type, object_id=obj_id)
 
+    def get_tags_for_many(self, keys):
+        """
+        Tags of many objects, possibly of different models, in one query.
+        Takes (model, object_id) pairs and returns {(model, object_id): [Tag]}
+        with an entry, maybe empty, for every pair.
+        """
+        keys = list(keys)
+        tags = {key: [] for key in keys}
+        if not keys:
+            return tags
+
+        ids = defaultdict(set)
+        for model, object_id in keys:
+            ids[model].add(object_id)
+        # get_for_models is served from the ContentType cache after the first call
+        content_types = ContentType.objects.get_for_models(*ids)
+        models_by_type = {content_type.id: model for model, content_type in content_types.items()}
+
+        condition = Q()
+        for model, object_ids in ids.items():
+            condition |= Q(content_type=content_types[model], object_id__in=object_ids)
+
+        items = (TaggedItem.objects.select_related('tag').filter(condition)
+                 .order_by('id').only('content_type_id', 'object_id', 'tag'))
+        for item in items:
+            tags[(models_by_type[item.content_type_id], item.object_id)].append(item.tag)
+        return tags
+
+    def get_tags_for_objects(self, objects):
+        """get_tags_for_many() for model instances, returns {(model, pk): [Tag]}."""
+        return self.get_tags_for_many((type(obj), obj.pk) for obj in objects)
+
 
 class Tag(models.Model):
     label = models.CharField(max_length=255)
@@ -28,5 +63,10 @@ class TaggedItem(models.Model):
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'object_id']),
+        ]
+
     def __str__(self):
         return self.label
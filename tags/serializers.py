@@ -0,0 +1,33 @@
+from rest_framework import serializers
+
+from .models import TaggedItem
+
+
+class TagsField(serializers.Field):
+    """
+    Read-only list of the object's tag labels. Inside TaggedListSerializer
+    the tags of the whole list were loaded up front; a single object costs
+    one query.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        tags = getattr(instance, '_prefetched_tags', None)
+        if tags is None:
+            tags = [item.tag for item in TaggedItem.objects.get_tags_for(type(instance), instance.pk)]
+        return [tag.label for tag in tags]
+
+
+class TaggedListSerializer(serializers.ListSerializer):
+    """list_serializer_class that loads the tags of every object with one query for TagsField."""
+
+    def to_representation(self, data):
+        objects = list(data.all() if hasattr(data, 'all') else data)
+        tags = TaggedItem.objects.get_tags_for_objects(objects)
+        for obj in objects:
+            obj._prefetched_tags = tags[(type(obj), obj.pk)]
+        return super().to_representation(objects)